@@ -1,14 +1,15 @@
 import os
 import random
-import json
+import shutil
 from PIL import Image, ImageDraw
 from Text import generate_text_images
 from Image import get_random_images
 from Graph import generate_graphs
+from coco_writer import ShardWriter, shard_file, finalize_coco
+from spatial_index import OccupancyGrid
 
 # Paths
 BASE_DIR = "dataset"
-os.makedirs(BASE_DIR, exist_ok=True)
 
 # Research paper page size
 PAGE_WIDTH = 1200
@@ -29,18 +30,7 @@ coco_template = {
     ]
 }
 
-# Initialize COCO data
-coco_data = coco_template.copy()
-
-def check_overlap(x, y, w, h, elements):
-    """Checks if a new element overlaps with any previously placed elements."""
-    for elem in elements:
-        ex, ey, ew, eh = elem["bbox"]
-        if not (x + w <= ex or ex + ew <= x or y + h <= ey or ey + eh <= y or x - w >= ex + ew or y - w >= ey + eh):
-            return True  # Overlap detected
-    return False
-
-def generate_research_page(page_id):
+def generate_research_page(page_id, writer, base_dir=BASE_DIR):
     """Generates a research paper-style page with images, graphs, and text blocks, using randomized offsets."""
     
     page = Image.new("RGB", (PAGE_WIDTH, PAGE_HEIGHT), "white")
@@ -48,8 +38,8 @@ def generate_research_page(page_id):
     
     part_height = (PAGE_HEIGHT - 2 * MARGIN) // NUM_PARTS
     elements = []
+    occupied = OccupancyGrid(PAGE_WIDTH, PAGE_HEIGHT)
     coco_annotations = []
-    image_id = len(coco_data["images"]) + 1
     
     for part in range(NUM_PARTS):
         upper_limit = MARGIN + part * part_height
@@ -82,13 +72,9 @@ def generate_research_page(page_id):
             left_offset = random.randint(-15, 15)
             x_position = max(left_limit + left_offset, MARGIN)
 
-            # Ensure no overlap
-            while check_overlap(x_position, y_position, width, height, elements):
-                x_position += 10  # Shift right until no overlap
-                if x_position + width > PAGE_WIDTH - MARGIN:
-                    break  # Avoid going out of bounds
-
-            if x_position + width > PAGE_WIDTH - MARGIN:
+            # Ensure no overlap: first free position to the right
+            x_position = occupied.next_free_x(x_position, y_position, width, height, PAGE_WIDTH - MARGIN)
+            if x_position is None:
                 break  # No more space
 
             # Generate element
@@ -110,6 +96,7 @@ def generate_research_page(page_id):
                     "path": image_path,
                     "bbox": (x_position, y_position, width, height)
                 })
+                occupied.occupy((x_position, y_position, width, height))
 
                 # Move to next position
                 left_limit = x_position + width + random.randint(10, 30)
@@ -126,8 +113,6 @@ def generate_research_page(page_id):
 
             # Add COCO annotation
             coco_annotations.append({
-                "id": len(coco_data["annotations"]) + 1,
-                "image_id": image_id,
                 "category_id": 1 if elem["type"] == 0 else 2 if elem["type"] == 2 else 3,
                 "bbox": list(elem["bbox"]),
                 "area": elem["bbox"][2] * elem["bbox"][3],
@@ -137,30 +122,37 @@ def generate_research_page(page_id):
             print(f"Error placing element {elem['path']}: {e}")
 
     # Save the page
-    page_path = os.path.join(BASE_DIR, f"page_{page_id}.jpg")
+    page_path = os.path.join(base_dir, f"page_{page_id}.jpg")
     page.save(page_path)
 
-    # Update COCO dataset
-    coco_data["images"].append({
-        "id": image_id,
-        "file_name": f"page_{page_id}.jpg",
-        "width": PAGE_WIDTH,
-        "height": PAGE_HEIGHT
+    # Stream the page to the COCO shard, ids are assigned by finalize_coco
+    writer.write_page({
+        "image": {
+            "file_name": f"page_{page_id}.jpg",
+            "width": PAGE_WIDTH,
+            "height": PAGE_HEIGHT
+        },
+        "annotations": coco_annotations
     })
-    coco_data["annotations"].extend(coco_annotations)
 
-def generate_dataset(num_pages):
+def generate_dataset(num_pages, base_dir=BASE_DIR):
     """Generates a dataset of research paper-style images."""
-    for page_id in range(1, num_pages + 1):
-        print(f"Generating page {page_id}...")
-        generate_research_page(page_id)
+    os.makedirs(base_dir, exist_ok=True)
+    shard_dir = os.path.join(base_dir, "shards")
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    shard_path = shard_file(shard_dir, 0)
+    with ShardWriter(shard_path) as writer:
+        for page_id in range(1, num_pages + 1):
+            print(f"Generating page {page_id}...")
+            generate_research_page(page_id, writer, base_dir)
 
     # Save COCO annotations
-    coco_path = os.path.join(BASE_DIR, "annotations.json")
-    with open(coco_path, "w") as f:
-        json.dump(coco_data, f, indent=4)
+    coco_path = os.path.join(base_dir, "annotations.json")
+    finalize_coco([shard_path], coco_template, coco_path, start_id=1)
+    shutil.rmtree(shard_dir)
 
     print(f"Dataset generated with {num_pages} pages. COCO annotations saved to {coco_path}.")
 
-# Generate dataset
-generate_dataset(10)  # Adjust the number of pages as needed
\ No newline at end of file
+if __name__ == "__main__":
+    # Generate dataset
+    generate_dataset(10)  # Adjust the number of pages as needed
\ No newline at end of file
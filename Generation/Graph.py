@@ -2,25 +2,16 @@ import os
 import random
 import numpy as np
 from PIL import Image
-import json5
 import matplotlib
 matplotlib.use('Agg')  # Use the Agg backend for non-GUI rendering
 import matplotlib.pyplot as plt
 from graphs import generate_random_line_plot, generate_random_scatter, generate_random_bar_graph, generate_random_histogram, generate_random_pie_chart, generate_blank_graph
 
-# Load configuration file
-def load_config(config_path):
-    with open(config_path, "r") as f:
-        config = json5.load(f)  # json5 allows comments
-    return config
-
-config = load_config("Generation/config.json5")
-
 # Global counter to track function calls
 call_count = 0
 
 # Function to generate graphs using functions from `graphs.py`
-def generate_graphs(num_graphs, sizes):
+def generate_graphs(num_graphs, sizes, rng=random):
     global call_count
     call_count += 1
     base_dir = "Generation"
@@ -28,8 +19,8 @@ def generate_graphs(num_graphs, sizes):
     os.makedirs(graph_dir, exist_ok=True)
     image_paths = []
 
-    # Randomize seed
-    random_seed = random.randint(0, 10000)
+    # graphs.py draws from the global RNGs, so seed them from the caller's stream
+    random_seed = rng.randint(0, 10000)
     np.random.seed(random_seed)
     random.seed(random_seed)
 
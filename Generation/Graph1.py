@@ -1,15 +1,18 @@
 import os
+import io
 import random
 import uuid
 import matplotlib 
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+from fonts import get_font
 
-def generate_graphs(num_graphs, sizes, caption_texts=None, caption_height=25, font_path="arial.ttf", font_size=14):
+def render_graphs(num_graphs, sizes, caption_texts=None, caption_height=25, font_path="arial.ttf", font_size=14, debug_dir=None,
+                  rng=random, mode="RGB"):
     """
-    Generates graphs with embedded captions.
-    Each graph is produced with a unique filename. The final image has extra space at the bottom for the caption.
+    Generates graphs with embedded captions, kept in memory.
+    Each graph gets a unique id. The final image has extra space at the bottom for the caption.
     
     :param num_graphs: number of graphs to generate.
     :param sizes: list of tuples for the desired (width, total_height) for the final output image.
@@ -18,7 +21,10 @@ def generate_graphs(num_graphs, sizes, caption_texts=None, caption_height=25, fo
     :param caption_height: Height (in pixels) reserved for caption text.
     :param font_path: Path to the font file.
     :param font_size: Font size for caption.
-    :returns: List of file paths for the generated graphs.
+    :param debug_dir: Optional folder where every final graph is also saved as a JPEG.
+    :param rng: Random stream of the page (random.Random-like), defaults to the global `random` module.
+    :param mode: PIL mode of the images, "RGB" or "L".
+    :returns: List of element dicts with the PIL image under "image", the graph type, unique id and caption.
     """
     # Dictionary mapping graph types to generation functions
     from graphs1 import generate_journal_line_plot, generate_journal_scatter_plot, generate_journal_bar_plot, generate_journal_pie_plot
@@ -29,24 +35,24 @@ def generate_graphs(num_graphs, sizes, caption_texts=None, caption_height=25, fo
         #'pie': generate_journal_pie_plot
     }
     
-    os.makedirs("Generation/graph", exist_ok=True)
-    image_paths = []
+    elements = []
     
     for i in range(num_graphs):
-        gtype = random.choice(list(graph_functions.keys()))
+        gtype = rng.choice(list(graph_functions.keys()))
         # Generate a new figure
-        fig = graph_functions[gtype]()
-        
-        # Generate a unique id
-        unique_id = uuid.uuid4().hex
-        temp_path = f"Generation/graph/temp_{gtype}_{unique_id}.png"
+        fig = graph_functions[gtype](rng)
         
-        # Save the graph temporarily
-        fig.savefig(temp_path, dpi=600, bbox_inches='tight', facecolor='white')
+        # Generate a unique id, drawn from the stream so the page can be reproduced
+        unique_id = uuid.UUID(int=rng.getrandbits(128), version=4).hex
+        # Render the graph into memory
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=600, bbox_inches='tight', facecolor='white',
+                    pil_kwargs={'compress_level': 0})  # Skip zlib, the buffer is decoded right away
         plt.close(fig)
+        buffer.seek(0)
         
-        # Open and convert the saved figure to RGB
-        img = Image.open(temp_path).convert("RGB")
+        # Open and convert the rendered figure to RGB or L
+        img = Image.open(buffer).convert(mode)
         
         # Get target dimensions for the final image (width and total height which includes caption space)
         target_width, target_total_height = sizes[i % len(sizes)]
@@ -56,7 +62,7 @@ def generate_graphs(num_graphs, sizes, caption_texts=None, caption_height=25, fo
         img = img.resize((target_width, target_img_height), Image.LANCZOS)
         
         # Create a new canvas with extra space for caption at the bottom
-        final_img = Image.new("RGB", (target_width, target_total_height), "white")
+        final_img = Image.new(mode, (target_width, target_total_height), "white")
         final_img.paste(img, (0, 0))
         
         # Determine the caption text: use provided one if available; otherwise use default caption.
@@ -64,15 +70,12 @@ def generate_graphs(num_graphs, sizes, caption_texts=None, caption_height=25, fo
             caption = caption_texts[i]
         else:
             # Default caption construction, for example "Fig <unique_id[:4]>: <random words>"
-            default_caption = f"Fig {unique_id[:4]}: " + " ".join(random.sample(["Time", "Measurement", "Experiment", "Data", "Result"], random.randint(1, 5)))
+            default_caption = f"Fig {unique_id[:4]}: " + " ".join(rng.sample(["Time", "Measurement", "Experiment", "Data", "Result"], rng.randint(1, 5)))
             caption = default_caption
         
         # Draw the caption
         draw = ImageDraw.Draw(final_img)
-        try:
-            font = ImageFont.truetype(font_path, font_size)
-        except IOError:
-            font = ImageFont.load_default()
+        font = get_font(font_path, font_size)
         
         # You can measure text and center it horizontally if desired:
         text_bbox = draw.textbbox((0, 0), caption, font=font)
@@ -82,12 +85,30 @@ def generate_graphs(num_graphs, sizes, caption_texts=None, caption_height=25, fo
         
         draw.text((x_text, y_text), caption, fill="black", font=font)
         
-        # Save final version
-        final_path = f"Generation/graph/{gtype}_{unique_id}.jpg"
-        final_img.save(final_path, quality=95)
-        image_paths.append(final_path)
-        
-        # Remove the temporary file
-        os.remove(temp_path)
+        if debug_dir:
+            os.makedirs(debug_dir, exist_ok=True)
+            final_img.save(os.path.join(debug_dir, f"{gtype}_{unique_id}.jpg"), quality=95)
+        elements.append({
+            "image": final_img,
+            "graph_type": gtype,
+            "id": unique_id,
+            "caption": caption
+        })
     
+    return elements
+
+def generate_graphs(num_graphs, sizes, caption_texts=None, caption_height=25, font_path="arial.ttf", font_size=14, rng=random):
+    """
+    Same as render_graphs but saves every graph under Generation/graph.
+
+    :returns: List of file paths for the generated graphs.
+    """
+    os.makedirs("Generation/graph", exist_ok=True)
+    image_paths = []
+
+    for elem in render_graphs(num_graphs, sizes, caption_texts, caption_height, font_path, font_size, rng=rng):
+        final_path = f"Generation/graph/{elem['graph_type']}_{elem['id']}.jpg"
+        elem["image"].save(final_path, quality=95)
+        image_paths.append(final_path)
+
     return image_paths
\ No newline at end of file
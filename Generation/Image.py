@@ -1,39 +1,50 @@
 import os
 import random
-from PIL import Image, ImageDraw, ImageFont
-import json5
-
-try:
-    with open('Generation/corpus.txt', 'r') as f:
-        corpus_words = [line.strip() for line in f if line.strip()]
-except Exception:
-    corpus_words = ["Time", "Measurement", "Experiment", "Data", "Result"]
-
-if not corpus_words:
-    corpus_words = ["Time", "Measurement", "Experiment", "Data", "Result"]
-
-# Loading JSON file
-def load_config(config_path):
-    with open(config_path, "r") as f:
-        config = json5.load(f)  # json5 allows comments
-    return config
-
-config = load_config("Generation/config.json5")
+from PIL import Image, ImageDraw
+from resources import load_config, corpus_words
+from fonts import get_font
+from image_catalog import image_catalog
+from prefetch import prefetcher
+from procedural import procedural_source, render_procedural
 
 # Global counter to track function calls
 call_count = 0
 
-import os
-import random
-from PIL import Image, ImageDraw, ImageFont
-
 # Make sure to define or initialize call_count (if it's used globally)
 call_count = 0
 
-def get_random_images(num_images, image_sizes, caption_texts=None, caption_height=20, font_path="arial.ttf", font_size=14,
-                      science_folder="Generation/science_images", non_science_folder="Generation/non_science_images"):
+def _source_picker(science_folder, non_science_folder):
+    """Function taking rng and drawing the source of a figure."""
+    config = load_config()
+    # Share of the figures drawn in numpy (procedural.py) instead of read from the folders
+    procedural_split = config.get("procedural_split", 0)
+    # Science and non-science images, listed once per process (image_catalog.py)
+    catalog = image_catalog(science_folder, non_science_folder) if procedural_split < 1 else None
+
+    def pick(rng):
+        if procedural_split and rng.random() < procedural_split:
+            return procedural_source(rng)
+        # 90% chance to pick a science image, else non-science.
+        return catalog.sample(rng, config["split"])
+    return pick
+
+def _draw_figure(i, pick, caption_texts, rng):
+    """Draws the source and caption of figure i, all the draws a figure takes from rng."""
+    source = pick(rng)
+    # Determine the caption text.
+    if caption_texts and i < len(caption_texts):
+        caption = caption_texts[i]
+    else:
+        # Create a default caption using random corpus words.
+        # The figure number comes from rng too, a process-wide counter would differ between workers.
+        caption = f"Fig {rng.randint(1, 99)}_{i+1}: " + " ".join(rng.sample(corpus_words(), rng.randint(1, 5)))
+    return source, caption
+
+def render_random_images(num_images, image_sizes, caption_texts=None, caption_height=20, font_path="arial.ttf", font_size=14,
+                         science_folder="Generation/science_images", non_science_folder="Generation/non_science_images",
+                         debug_dir=None, rng=random, mode="RGB"):
     """
-    Returns a list of images with captions already embedded.
+    Returns a list of images with captions already embedded, kept in memory.
     Each image is resized to a given target size which includes extra caption space at the bottom.
     
     :param num_images: Number of images to pick.
@@ -42,32 +53,20 @@ def get_random_images(num_images, image_sizes, caption_texts=None, caption_heigh
     :param caption_height: Height (in pixels) reserved for caption text.
     :param font_path: Path to the font used for caption.
     :param font_size: Font size for caption.
-    :returns: List of file paths to the generated images.
+    :param debug_dir: Optional folder where every final image is also saved as a JPEG.
+    :param rng: Random stream of the page (random.Random-like), defaults to the global `random` module.
+    :param mode: PIL mode of the images, "RGB" or "L".
+    :returns: List of element dicts with the PIL image under "image", the source file and the caption.
     """
     global call_count
     call_count += 1
-    base_dir = "Generation"
-    image_dir = os.path.join(base_dir, "image")
-    os.makedirs(image_dir, exist_ok=True)
-    image_paths = []
+    elements = []
 
-    # List science and non-science images
-    science_images = [os.path.join(science_folder, f) for f in os.listdir(science_folder) if f.lower().endswith(('.jpg', '.png', '.jpeg'))]
-    non_science_images = [os.path.join(non_science_folder, f) for f in os.listdir(non_science_folder) if f.lower().endswith(('.jpg', '.png', '.jpeg'))]
-
-    if not science_images:
-        raise ValueError("No science images found in the specified folder.")
-    if not non_science_images:
-        raise ValueError("No non-science images found in the specified folder.")
+    pick = _source_picker(science_folder, non_science_folder)
 
     for i in range(num_images):
-        # 90% chance to pick a science image, else non-science.
-        if random.random() < config["split"]:
-            image_path = random.choice(science_images)
-        else:
-            image_path = random.choice(non_science_images)
-
-        img = Image.open(image_path)
+        source, caption = _draw_figure(i, pick, caption_texts, rng)
+        image_path = source["path"]
 
         # Get target dimensions (target_width, total_height)
         target_width, target_total_height = image_sizes[i % len(image_sizes)]
@@ -75,27 +74,19 @@ def get_random_images(num_images, image_sizes, caption_texts=None, caption_heigh
         target_total_height = int(target_total_height)
         target_img_height = target_total_height - caption_height  # Space reserved for caption
 
-        # Resize the image for the graphic region.
-        img = img.resize((target_width, target_img_height), Image.LANCZOS)
+        if source["class"] == "procedural":
+            img = render_procedural(source["kind"], (target_width, target_img_height), rng, mode)
+        else:
+            # Resize the image for the graphic region, prefetched or from the worker's decoded pyramid of the source
+            img = prefetcher().resized(source, (target_width, target_img_height), mode)
 
         # Create a new canvas that provides space for the caption.
-        new_img = Image.new("RGB", (target_width, target_total_height), "white")
+        new_img = Image.new(mode, (target_width, target_total_height), "white")
         new_img.paste(img, (0, 0))
 
-        # Determine the caption text.
-        if caption_texts and i < len(caption_texts):
-            caption = caption_texts[i]
-        else:
-            # Create a default caption using random corpus words.
-            default_caption = f"Fig {call_count}_{i+1}: " + " ".join(random.sample(corpus_words, random.randint(1, 5)))
-            caption = default_caption
-
         # Draw the caption on new_img
         draw = ImageDraw.Draw(new_img)
-        try:
-            font = ImageFont.truetype(font_path, font_size)
-        except IOError:
-            font = ImageFont.load_default()
+        font = get_font(font_path, font_size)
         text_bbox = draw.textbbox((0, 0), caption, font=font)
         text_width = text_bbox[2] - text_bbox[0]
         # Center the caption horizontally
@@ -103,9 +94,54 @@ def get_random_images(num_images, image_sizes, caption_texts=None, caption_heigh
         y_text = target_img_height + (caption_height - font_size) // 2
         draw.text((x_text, y_text), caption, fill="black", font=font)
 
-        # Save final image
+        if debug_dir:
+            os.makedirs(debug_dir, exist_ok=True)
+            new_img.save(os.path.join(debug_dir, f"{call_count}_{i+1}.jpg"))
+        elements.append({
+            "image": new_img,
+            "source": image_path,
+            "caption": caption
+        })
+
+    return elements
+
+def prefetch_random_images(num_images, image_sizes, caption_texts=None, caption_height=20,
+                           science_folder="Generation/science_images", non_science_folder="Generation/non_science_images",
+                           rng=random, mode="RGB"):
+    """
+    Starts decoding and resizing, in the background, the source images that render_random_images
+    will pick when called with the same arguments and a stream in the same state as `rng`.
+    The draws are replayed on a copy, `rng` itself is left untouched.
+    Best effort: a missing or empty folder is skipped here, rendering reports it.
+    """
+    replay = random.Random()
+    replay.setstate(rng.getstate())
+    try:
+        pick = _source_picker(science_folder, non_science_folder)
+        for i in range(num_images):
+            source, _ = _draw_figure(i, pick, caption_texts, replay)
+            if source["class"] != "procedural":
+                target_width, target_total_height = image_sizes[i % len(image_sizes)]
+                prefetcher().prefetch(source, (int(target_width), int(target_total_height) - caption_height), mode)
+    except (OSError, ValueError):
+        pass
+
+def get_random_images(num_images, image_sizes, caption_texts=None, caption_height=20, font_path="arial.ttf", font_size=14,
+                      science_folder="Generation/science_images", non_science_folder="Generation/non_science_images", rng=random):
+    """
+    Same as render_random_images but saves every image under Generation/image.
+
+    :returns: List of file paths to the generated images.
+    """
+    image_dir = os.path.join("Generation", "image")
+    os.makedirs(image_dir, exist_ok=True)
+    image_paths = []
+
+    elements = render_random_images(num_images, image_sizes, caption_texts, caption_height, font_path, font_size,
+                                    science_folder, non_science_folder, rng=rng)
+    for i, elem in enumerate(elements):
         save_path = os.path.join(image_dir, f"{call_count}_{i+1}.jpg")
-        new_img.save(save_path)
+        elem["image"].save(save_path)
         image_paths.append(save_path)
 
     return image_paths
@@ -1,21 +1,25 @@
 import os
 import random
-from PIL import Image, ImageDraw, ImageFont
-import json5
-
-# Load json configuration file
-def load_config(config_path):
-    with open(config_path, "r") as f:
-        config = json5.load(f)  # json5 allows comments
-    return config
-
-config = load_config("Generation/config.json5")
+import string
+from functools import lru_cache
+from itertools import islice
+import numpy as np
+from PIL import Image, ImageDraw
+from resources import resource_path, get_corpus
+from fonts import get_font, resolve_bold_font
+from page_random import numpy_generator
+from text_atlas import word_atlas, blit
+from text_source import configured_text_source
 
 # Global counter to track function calls
 call_count = 0
 
+# Text blocks are composed from pre-rasterized word sprites (text_atlas.py) instead of one
+# draw.text call per word. Both renderers give the same pixels, False draws with PIL.
+USE_WORD_ATLAS = True
+
 # Path to the corpus file
-CORPUS_FILE = "Generation/corpus.txt"
+CORPUS_FILE = resource_path("corpus.txt")
 
 # Function to load words from the corpus file
 def load_corpus(corpus_file):
@@ -23,123 +27,353 @@ def load_corpus(corpus_file):
         words = [line.strip() for line in file if line.strip()]
     return words
 
+# Width of every distinct word, measured once per font.
+# Fonts come from the fonts.get_font cache, so a font object stands for one (file, size).
+_word_widths = {}
+# Words kept per font, a large text source has too many distinct words to keep them all
+MAX_CACHED_WORDS = 100000
+
+def word_width(font, word):
+    widths = _word_widths.get(font)
+    if widths is None:
+        widths = _word_widths[font] = {}
+    width = widths.get(word)
+    if width is None:
+        if len(widths) >= MAX_CACHED_WORDS:
+            widths.clear()
+        bbox = font.getbbox(word)
+        width = widths[word] = bbox[2] - bbox[0]
+    return width
+
+def space_width(font):
+    return word_width(font, " ") or int(font.getlength(" "))
+
+# (word, width) pairs of plain words
+def measure_words(words, font):
+    for word in words:
+        yield word, word_width(font, word)
+
+# (word, width) pairs of `count` random corpus words, sampled with numpy in batches
+# so that a full box stops the sampling early
+def sample_words(corpus, count, g, font, batch=64):
+    while count > 0:
+        ids = corpus.sample_ids(min(batch, count), g)
+        yield from zip(corpus.words(ids), corpus.widths(font, ids, word_width).tolist())
+        count -= len(ids)
+
+# Wrap measured words to fit within max width, keeping a running line width
+def wrap_measured(measured, space, max_width, max_lines=None):
+    """
+    Greedy line wrapping over (word, width) pairs.
+
+    :param measured: Iterable of (word, width), consumed lazily.
+    :param max_lines: Stop once this many lines are complete, the rest of `measured` is never read.
+    :returns: List of lines, each a (words, word widths) pair, so the justifier needs no measuring.
+    """
+    lines = []
+    if max_lines is not None and max_lines <= 0:
+        return lines
+    line_words, line_widths, line_width = [], [], 0
+    for word, width in measured:
+        if line_words and line_width + space + width > max_width:
+            lines.append((line_words, line_widths))
+            if len(lines) == max_lines:
+                return lines
+            line_words, line_widths, line_width = [], [], 0
+        line_width += (space if line_words else 0) + width
+        line_words.append(word)
+        line_widths.append(width)
+    if line_words:
+        lines.append((line_words, line_widths))
+    return lines
+
+# Wrap words to fit within max width, measuring each distinct word once per font
+def wrap_words(words, font, max_width, max_lines=None):
+    return wrap_measured(measure_words(words, font), space_width(font), max_width, max_lines)
+
 # Wrap text to fit within max width
 def wrap_text(text, font, max_width):
-    lines = []
-    words = text.split()
-    current_line = words[0]
-
-    for word in words[1:]:
-        bbox = font.getbbox(current_line + " " + word)
-        text_width = bbox[2] - bbox[0]
-        if text_width <= max_width:
-            current_line += " " + word
+    return [" ".join(line_words) for line_words, _ in wrap_words(text.split(), font, max_width)]
+
+def line_height(font):
+    bbox = font.getbbox("hg")
+    return bbox[3] - bbox[1] + 5  # Increased spacing
+
+# Rows a line's ink can cover relative to its y, for letters and digits
+def ink_rows(font):
+    return font.getbbox(string.ascii_letters + string.digits)[1::2]
+
+# Wrap only the lines that fit within the image height
+def layout_text(measured, font, max_width, image_height):
+    """
+    Height-bounded layout: the line capacity is known up front, so wrapping (and lazy sampling
+    of `measured`) stops at the last visible line instead of wrapping everything and truncating.
+
+    :param measured: Iterable of (word, width) pairs in `font`.
+    :returns: (lines as returned by wrap_measured, line height)
+    """
+    height = line_height(font)
+    max_lines = (image_height - 10) // height  # Keeping 10px bottom margin
+    return wrap_measured(measured, space_width(font), max_width, max_lines), height
+
+# Draw wrapped lines, justified unless bold
+def draw_lines(draw, lines, font, x, y, max_width, height, bold=False):
+    for words_in_line, widths in lines:
+        if bold or len(words_in_line) == 1:
+            # For bold text, simply draw left-aligned
+            draw.text((x, y), " ".join(words_in_line), font=font, fill="black")
         else:
-            lines.append(current_line)
-            current_line = word
+            # Original justification logic for non-bold text, with the widths from wrapping
+            total_spacing = max_width - sum(widths)
+            space_between_words = total_spacing // (len(words_in_line) - 1)
 
-    lines.append(current_line)
-    return lines
+            x_offset = x
+            for word, width in zip(words_in_line, widths):
+                draw.text((x_offset, y), word, font=font, fill="black")
+                x_offset += width + space_between_words
+
+        y += height  # Adjusted for more spacing
+
+# Columns [left, right) of the ink of a coverage sprite drawn at x
+def _ink_span(sprite, x):
+    coverage, dx, _ = sprite
+    cols = np.flatnonzero(coverage.any(axis=0))
+    return (x + dx + cols[0], x + dx + cols[-1] + 1) if len(cols) else (x + dx, x + dx)
+
+# Boxes of the drawn lines and words, relative to the block
+def text_boxes(lines, font, x, y, max_width, height, bold=False, fake_bold=False):
+    """
+    Line and word boxes of lines laid out as draw_lines draws them. Horizontally a box spans the
+    exact ink columns of the word as drawn, vertically the ink rows of the font's letters.
+
+    :param fake_bold: The lines are drawn twice, one pixel apart.
+    :returns: (line boxes, word boxes), each an [x, y, width, height] list.
+    """
+    top, bottom = ink_rows(font)
+    extra = 1 if fake_bold else 0
+    atlas = word_atlas()
+    line_boxes, word_boxes = [], []
+    for words_in_line, widths in lines:
+        if len(words_in_line) == 1:
+            spans = [_ink_span(atlas.sprite(font, words_in_line[0]), x)]
+        elif bold:
+            # Drawn as one string: words are located from their advances, then snapped to the
+            # ink of the rasterized line between the gaps to their neighbours
+            coverage, dx, _ = atlas.rasterize(font, " ".join(words_in_line))
+            ink = np.flatnonzero(coverage.any(axis=0)) + x + dx
+            approx = []
+            for k, word in enumerate(words_in_line):
+                left, _, right, _ = font.getbbox(word)
+                end = x + font.getbbox(" ".join(words_in_line[:k + 1]))[2]
+                approx.append((end - (right - left), end))
+            spans = []
+            for k, (left, right) in enumerate(approx):
+                lo = (approx[k - 1][1] + left) // 2 if k else ink[0]
+                hi = (right + approx[k + 1][0]) // 2 if k + 1 < len(approx) else ink[-1] + 1
+                cols = ink[(ink >= lo) & (ink < hi)]
+                spans.append((int(cols[0]), int(cols[-1]) + 1) if len(cols) else (left, right))
+        else:
+            space_between_words = (max_width - sum(widths)) // (len(words_in_line) - 1)
+            spans, x_offset = [], x
+            for word, width in zip(words_in_line, widths):
+                spans.append(_ink_span(atlas.sprite(font, word), x_offset))
+                x_offset += width + space_between_words
+        spans = [(int(left), int(right)) for left, right in spans]
+        for left, right in spans:
+            word_boxes.append([left, y + top, right - left + extra, bottom - top])
+        line_boxes.append([spans[0][0], y + top, spans[-1][1] + extra - spans[0][0], bottom - top])
+        y += height
+    return line_boxes, word_boxes
+
+# Same as draw_lines, blitting word sprites into a grayscale uint8 array.
+# Left-aligned lines are rasterized whole, as draw.text would, and not kept in the atlas.
+def blit_lines(canvas, lines, font, x, y, max_width, height, bold=False):
+    atlas = word_atlas()
+    for words_in_line, widths in lines:
+        if bold or len(words_in_line) == 1:
+            blit(canvas, atlas.rasterize(font, " ".join(words_in_line)), x, y)
+        else:
+            total_spacing = max_width - sum(widths)
+            space_between_words = total_spacing // (len(words_in_line) - 1)
+
+            x_offset = x
+            for word, width in zip(words_in_line, widths):
+                blit(canvas, atlas.sprite(font, word), x_offset, y)
+                x_offset += width + space_between_words
+
+        y += height
 
 # Function to justify text and draw on image
 def justify_text(draw, text, font, x, y, max_width, image_height, bold=False):
-    lines = wrap_text(text, font, max_width)
-    line_height = font.getbbox("hg")[3] - font.getbbox("hg")[1] + 5  # Increased spacing
+    lines, height = layout_text(measure_words(text.split(), font), font, max_width, image_height)
+    draw_lines(draw, lines, font, x, y, max_width, height, bold)
 
-    # Calculate total text height
-    total_text_height = len(lines) * line_height
+# Characters the mean advance of a font is measured on
+ADVANCE_SAMPLE = string.ascii_lowercase + " "
+# Characters a wrapped line is assumed to lose at its break
+WRAP_SLACK = 4
 
-    # Check if text fits within the image height, if not, reduce lines
-    if total_text_height > image_height - 10:  # Keeping 10px bottom margin
-        lines = lines[: (image_height - 10) // line_height]
+# Line height and mean advance per character of a block font, measured once per (font, size, bold)
+@lru_cache(maxsize=1024)
+def font_metrics(font_path, font_size, bold=False):
+    font = block_font(font_path, font_size, bold)[0]
+    return line_height(font), font.getlength(ADVANCE_SAMPLE) / len(ADVANCE_SAMPLE)
 
-    for line in lines:
-        if bold:
-            # For bold text, simply draw left-aligned
-            draw.text((x, y), line, font=font, fill="black")
+# Pick a font size that fits the box from the cached metrics, nothing is rendered
+def fit_font_size(font_path, image_size, text=None, bold=False, fill=0.8, min_size=8, max_size=72):
+    """
+    Binary search of the largest size whose text fits the box.
+
+    :param text: Text to fit, its lines may take at most `fill` of the box height.
+                 None for sampled text, which fills any box: at least one line has to fit.
+    :returns: Font size in [min_size, max_size], min_size if nothing fits.
+    """
+    width, height = image_size[0] - 20, image_size[1] - 10  # Margins of render_text_block
+
+    def fits(size):
+        height_per_line, advance = font_metrics(font_path, size, bold)
+        if text is None:
+            return height_per_line <= height
+        per_line = max(1, int(width / advance) - WRAP_SLACK)
+        lines = -(-len(text) // per_line)
+        return lines * height_per_line <= fill * height
+
+    low, high = min_size, max_size
+    while low < high:
+        mid = (low + high + 1) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+# Font of a text block and whether its bold has to be faked
+def block_font(font_path, font_size, bold=False):
+    # Fonts and their bold variants are resolved once per process (fonts.py)
+    fake_bold = bold and resolve_bold_font(font_path) is None
+    return get_font(font_path, font_size, bold=bold and not fake_bold), fake_bold
+
+# Render a text block, returns the image and the lines drawn on it
+def render_text_block(text, image_size, font_path="times.ttf", font_size=14, bold=False, word_count=None, rng=random,
+                      mode="RGB"):
+    """
+    :param text: Text to draw, or None to draw `word_count` random corpus words (or words of the
+                 configured text source) sampled from rng's numpy stream, only as far as the box is filled.
+    :param mode: PIL mode of the image, "RGB" or "L".
+    :returns: (image, lines as returned by wrap_words)
+    """
+    font, fake_bold = block_font(font_path, font_size, bold)
+    if text is None:
+        source = configured_text_source()
+        if source is not None:
+            measured = measure_words(islice(source.iter_words(numpy_generator(rng)), word_count), font)
         else:
-            # Original justification logic for non-bold text
-            words_in_line = line.split()
-            if len(words_in_line) > 1:
-                total_text_width = sum(font.getbbox(word)[2] - font.getbbox(word)[0] for word in words_in_line)
-                total_spacing = max_width - total_text_width
-                space_between_words = total_spacing // (len(words_in_line) - 1) if len(words_in_line) > 1 else 0
-
-                x_offset = x
-                for word in words_in_line:
-                    draw.text((x_offset, y), word, font=font, fill="black")
-                    x_offset += font.getbbox(word)[2] - font.getbbox(word)[0] + space_between_words
-            else:
-                draw.text((x, y), line, font=font, fill="black")
-
-        y += line_height  # Adjusted for more spacing
+            measured = sample_words(get_corpus(), word_count, numpy_generator(rng), font)
+    else:
+        measured = measure_words(text.split(), font)
+    lines, height = layout_text(measured, font, image_size[0] - 20, image_size[1])
+    if USE_WORD_ATLAS:
+        # Black text on white, so the block is composed in one channel
+        canvas = np.full((image_size[1], image_size[0]), 255, dtype=np.uint8)
+        draw, render = canvas, blit_lines
+    else:
+        image = Image.new(mode, image_size, "white")
+        draw, render = ImageDraw.Draw(image), draw_lines
+    if fake_bold:
+        # Fake bold effect if no bold font found
+        # Draw text twice with slight offset for bold effect
+        render(draw, lines, font, 11, 10, image_size[0] - 20, height, bold=True)  # Offset right
+        render(draw, lines, font, 10, 10, image_size[0] - 20, height, bold=True)  # Original
+    else:
+        render(draw, lines, font, 10, 10, image_size[0] - 20, height, bold=bold)
+    if USE_WORD_ATLAS:
+        image = to_mode(canvas, mode)
+    return image, lines
+
+# Grayscale block array as a PIL image of the given mode
+def to_mode(array, mode="RGB"):
+    image = Image.fromarray(array)
+    return image if mode == "L" else image.convert(mode)
 
 # Generate a text image with proper spacing
 def generate_text_image(text, image_size, font_path="times.ttf", font_size=14, bold=False):
-    image = Image.new("RGB", image_size, "white")
-    draw = ImageDraw.Draw(image)
-
-    try:
-        if bold:
-            # Attempt 1: Load dedicated bold font (e.g., "timesbd.ttf")
-            bold_font_variants = [
-                font_path.replace(".ttf", "bd.ttf"),  # Common pattern (timesbd.ttf)
-                font_path.replace(".ttf", "-bold.ttf"),  # Alternate pattern (times-bold.ttf)
-                os.path.join(os.path.dirname(font_path), "Bold", os.path.basename(font_path))  # Bold subfolder
-            ]
-            
-            for bold_font_path in bold_font_variants:
-                try:
-                    font = ImageFont.truetype(bold_font_path, font_size)
-                    print("Bold Text Found:" + font_path)
-                    break  # Successfully loaded bold font
-                except IOError:
-                    continue
-            else:
-                # Attempt 2: Fake bold effect if no bold font found
-                print("Using Fake Bold:" + font_path)
-                font = ImageFont.truetype(font_path, font_size)
-                # Draw text twice with slight offset for bold effect
-                justify_text(draw, text, font, 11, 10, image_size[0] - 20, image_size[1], bold=True)  # Offset right
-                justify_text(draw, text, font, 10, 10, image_size[0] - 20, image_size[1], bold=True)  # Original
-                return image  # Early return since we manually drew bold text
-        else:
-            font = ImageFont.truetype(font_path, font_size)
-    except IOError:
-        print(f"Font {font_path} not found. Using default font.")
-        font = ImageFont.load_default()
+    return render_text_block(text, image_size, font_path, font_size, bold)[0]
 
-    justify_text(draw, text, font, 10, 10, image_size[0] - 20, image_size[1], bold=bold)
-    return image
+# Render multiple text images in memory
+def render_text_images(num_images, image_sizes, font="times.ttf", size=14, bold=False, text=None, debug_dir=None, rng=random,
+                       mode="RGB"):
+    """
+    Renders text blocks without touching the disk.
 
-# Generate multiple text images
-def generate_text_images(num_images, image_sizes, font="times.ttf", size=14, bold=False, text=None):
+    :param rng: Random stream of the page (random.Random-like), defaults to the global `random` module.
+    :param mode: PIL mode of the images, "RGB" or "L".
+    :returns: List of element dicts with the PIL image under "image" plus the text and font used
+              (for sampled text, the words that fit in the box) and the "line_boxes" and
+              "word_boxes" of the drawn text relative to the block, as returned by text_boxes.
+              When debug_dir is given every image is also written there as a JPEG.
+    """
     global call_count
     call_count += 1
-    base_dir = "Generation"
-    text_dir = os.path.join(base_dir, "text")
-    os.makedirs(text_dir, exist_ok=True)
-    image_paths = []
-
-    words = load_corpus(CORPUS_FILE)
-    if not words:
-        raise ValueError("Corpus file is empty or not found.")
+    elements = []
+    block_font_obj, fake_bold = block_font(font, size, bold)
 
     for i in range(num_images):
         img_size = image_sizes[i % len(image_sizes)]
         
-        # Use provided text or generate random
+        # Use provided text or generate random, sampled only as far as the box is filled
         if text:
+            img, lines = render_text_block(text, img_size, font, size, bold, mode=mode)
             current_text = text
         else:
-            num_words = random.randint(800, 1200)
-            current_text = " ".join(random.choices(words, k=num_words))
+            num_words = rng.randint(800, 1200)
+            img, lines = render_text_block(None, img_size, font, size, bold, word_count=num_words, rng=rng, mode=mode)
+            current_text = " ".join(" ".join(line_words) for line_words, _ in lines)
+        line_boxes, word_boxes = text_boxes(lines, block_font_obj, 10, 10, img_size[0] - 20,
+                                            line_height(block_font_obj), bold, fake_bold)
+
+        if debug_dir:
+            os.makedirs(debug_dir, exist_ok=True)
+            img.save(os.path.join(debug_dir, f"{call_count}_{i+1}.jpg"))
+        elements.append({
+            "image": img,
+            "text": current_text,
+            "font": font,
+            "size": size,
+            "bold": bold,
+            "line_boxes": line_boxes,
+            "word_boxes": word_boxes
+        })
+
+    return elements
+
+# Line and word boxes of a text element pasted at (x, y), in page coordinates
+def placed_text_boxes(element, x, y):
+    """
+    :param element: Element dict of render_text_images.
+    :returns: (line boxes, word boxes), each an [x, y, width, height] list.
+    """
+    return ([[bx + x, by + y, w, h] for bx, by, w, h in element["line_boxes"]],
+            [[bx + x, by + y, w, h] for bx, by, w, h in element["word_boxes"]])
+
+# Generate multiple text images and save them to Generation/text
+def generate_text_images(num_images, image_sizes, font="times.ttf", size=14, bold=False, text=None, rng=random,
+                         return_boxes=False):
+    """
+    :param return_boxes: Also return the (line boxes, word boxes) of every image, relative to the image.
+    :returns: The saved paths, or (paths, boxes) with return_boxes.
+    """
+    text_dir = os.path.join("Generation", "text")
+    os.makedirs(text_dir, exist_ok=True)
+    image_paths = []
 
-        img = generate_text_image(current_text, img_size, font, size, bold)
+    elements = render_text_images(num_images, image_sizes, font, size, bold, text, rng=rng)
+    for i, elem in enumerate(elements):
         save_path = os.path.join(text_dir, f"{call_count}_{i+1}.jpg")
-        img.save(save_path)
+        elem["image"].save(save_path)
         image_paths.append(save_path)
 
+    if return_boxes:
+        return image_paths, [(elem["line_boxes"], elem["word_boxes"]) for elem in elements]
     return image_paths
 # Example usage
 #image_sizes = [[500, 30], [391, 271], [380, 380], [400, 350], [600, 250], [600, 350]]
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The generator modules import each other by plain module name (from Text import ...) so that
+# they also run as scripts. Put this folder on the path when it is imported as a package.
+_GENERATION_DIR = os.path.dirname(os.path.abspath(__file__))
+if _GENERATION_DIR not in sys.path:
+    sys.path.insert(0, _GENERATION_DIR)
@@ -0,0 +1,60 @@
+import argparse
+import importlib
+import os
+import random
+import sys
+import numpy as np
+
+# Single entry point for the page generators:
+#   python -m Generation --layout columns --pages 100 --workers 4 --seed 0 --output dataset
+# Only the chosen generator module is imported.
+
+if __package__ in (None, ""):
+    # Run as a plain script (python Generation/__main__.py)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+else:
+    import Generation  # noqa: F401  Puts the generator modules on the path
+
+# Layouts rendered by the multi-process engine, seeded per page
+ENGINE_LAYOUTS = {
+    "columns": "dataset3",  # 1 or 2 column rows of figures, text and page numbers, scan artifacts
+    "title": "dataset5"     # Title section over 1 or 2 columns of text and captioned figures
+}
+
+# Older single-process layouts drawing from the global random state
+LEGACY_LAYOUTS = {
+    "scatter": "Dataset",   # Elements packed anywhere on the page
+    "rows": "Dataset_1",    # Three horizontal bands filled left to right
+    "grid": "dataset2"      # Fixed grid of cells with a shadow effect
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m Generation",
+                                     description="Generate synthetic research paper pages with COCO annotations")
+    parser.add_argument("--layout", choices=sorted({**ENGINE_LAYOUTS, **LEGACY_LAYOUTS}), default="columns",
+                        help="Page generator")
+    parser.add_argument("--pages", type=int, default=10, help="Number of pages to generate")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="Run seed")
+    parser.add_argument("--output", default="dataset", help="Dataset folder")
+    parser.add_argument("--compress", action="store_true", help="Gzip the annotation shards")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run, skipping finished pages")
+    parser.add_argument("--layout-only", action="store_true",
+                        help="Only place elements and report box statistics, nothing is rendered")
+    args = parser.parse_args(argv)
+
+    if args.layout in ENGINE_LAYOUTS:
+        module = importlib.import_module(ENGINE_LAYOUTS[args.layout])
+        module.generate_dataset(args.pages, args.workers, args.seed, args.compress, args.resume,
+                                args.layout_only, args.output)
+        return
+
+    if args.workers > 1 or args.compress or args.resume or args.layout_only:
+        parser.error(f"--layout {args.layout} only supports --pages, --seed and --output")
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    module = importlib.import_module(LEGACY_LAYOUTS[args.layout])
+    module.generate_dataset(args.pages, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import json
+import numpy as np
+from PIL import Image
+from checkpoint import atomic_write_json
+
+# Read-only assets shared by all worker processes.
+# The parent writes arrays once into a file, each 64-byte aligned, with a JSON index of their
+# offsets, dtypes and shapes. Workers attach with a read-only memory map and get numpy views on
+# it, so every worker reads the same pages of the OS page cache and memory stays flat as workers
+# are added. Memory-mapped files are used over multiprocessing.shared_memory, whose segments a
+# worker's resource tracker may unlink on exit.
+# A store carries the version of what it was built from, so a later run reuses it as long as
+# that version is unchanged instead of building it again.
+#
+# The stores hold the decoded pyramid levels of the source images (image_cache.py); a worker
+# maps them as PIL images without decoding or copying. Fonts are opened from their files by
+# FreeType, which already shares them through the page cache, and the corpus is a few kilobytes.
+
+ALIGNMENT = 64
+
+# PIL modes of stored images and the raw layout they are stored in, PIL keeps RGB as RGBX
+_LAYOUTS = {"RGB": ("RGBX", 4), "L": ("L", 1)}
+
+def index_file(path):
+    return path + ".json"
+
+def store_version(path):
+    """Version a store was written with, None if there is no complete store at `path`."""
+    try:
+        with open(index_file(path), "r") as f:
+            version = json.load(f)["version"]
+        return version if os.path.exists(path) else None
+    except (OSError, ValueError, KeyError):
+        return None
+
+class StoreWriter:
+    def __init__(self, path, version=None):
+        """
+        :param path: Store file, written next to it and moved in place with its index on close.
+        :param version: JSON-serializable version of the contents, see store_version.
+        """
+        self.path = path
+        self.version = version
+        self.index = {}
+        self.file = open(path + ".tmp", "wb")
+
+    def add(self, name, array):
+        array = np.ascontiguousarray(array)
+        offset = -(-self.file.tell() // ALIGNMENT) * ALIGNMENT
+        self.file.write(b"\0" * (offset - self.file.tell()))
+        self.file.write(array.tobytes())
+        self.index[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+    def add_image(self, name, image):
+        """Stores a "RGB" or "L" PIL image so that it maps back without a copy."""
+        raw_mode, channels = _LAYOUTS[image.mode]
+        array = np.asarray(image.convert(raw_mode) if raw_mode != image.mode else image)
+        self.add(name, array.reshape(image.height, image.width, channels))
+
+    def close(self):
+        self.file.close()
+        # The old index goes first and the new one last, so an index never describes another file.
+        # Maps of an older store keep their own file.
+        if os.path.exists(index_file(self.path)):
+            os.remove(index_file(self.path))
+        os.replace(self.path + ".tmp", self.path)
+        atomic_write_json(index_file(self.path), {"version": self.version, "arrays": self.index})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Keep whatever store was there, drop the partial one
+            self.file.close()
+            os.remove(self.path + ".tmp")
+
+class AssetStore:
+    def __init__(self, path):
+        with open(index_file(path), "r") as f:
+            self.index = json.load(f)["arrays"]
+        self.map = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else None
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def array(self, name):
+        """Read-only view of a stored array."""
+        entry = self.index[name]
+        return np.ndarray(entry["shape"], dtype=np.dtype(entry["dtype"]), buffer=self.map, offset=entry["offset"])
+
+    def image(self, name, mode):
+        """A stored image as a read-only PIL image on the map, mode "RGB" maps as RGBX."""
+        array = self.array(name)
+        raw_mode = _LAYOUTS[mode][0]
+        return Image.frombuffer(raw_mode, (array.shape[1], array.shape[0]), array, "raw", raw_mode, 0, 1)
+
+# The stores this process is attached to
+_stores = []
+
+def attach_stores(paths):
+    """Worker initializer, maps the stores at `paths`, skipping None entries (None detaches all)."""
+    global _stores
+    _stores = [AssetStore(path) for path in paths or [] if path]
+
+def shared_store(name):
+    """The attached AssetStore holding `name`, None when no store has it."""
+    for store in _stores:
+        if name in store:
+            return store
+    return None
@@ -0,0 +1,76 @@
+import os
+import json
+from coco_writer import read_shard, ShardWriter
+
+# Crash-safe checkpointing for long generation runs.
+# run.json in the shard folder records the run: seed, page ids and the page range of every shard.
+# Next to every shard a .ckpt.json records how many of its pages are complete and the
+# annotation high-water mark. Pages draw from page_rng(seed, page_id), so the seed is the
+# whole RNG state of the run, and ids are assigned in page order by finalize_coco, so a
+# resumed run ends up with the same pages and the same ids as an uninterrupted one.
+
+def atomic_save(image, path, **save_kwargs):
+    """Saves a PIL image to a temp file next to path and renames it into place."""
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.tmp{ext}"
+    image.save(tmp_path, **save_kwargs)
+    os.replace(tmp_path, path)
+
+def atomic_write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def run_manifest_path(shard_dir):
+    return os.path.join(shard_dir, "run.json")
+
+def checkpoint_path(shard_path):
+    return shard_path + ".ckpt.json"
+
+def write_checkpoint(shard_path, seed, pages_done, last_page, annotations):
+    atomic_write_json(checkpoint_path(shard_path), {
+        "seed": seed,
+        "pages_done": pages_done,
+        "last_page": last_page,
+        "annotations": annotations
+    })
+
+def recover_shard(shard_path):
+    """
+    Cuts a shard back to the pages its checkpoint vouches for.
+    A record written after the last checkpoint, or cut off by the crash, is dropped;
+    its page is simply rendered again.
+
+    :returns: (pages_done, annotations) of the shard.
+    """
+    ckpt = load_json(checkpoint_path(shard_path))
+    if ckpt is None or not os.path.exists(shard_path):
+        if os.path.exists(shard_path):
+            os.remove(shard_path)
+        return 0, 0
+
+    records = []
+    try:
+        for record in read_shard(shard_path):
+            if len(records) == ckpt["pages_done"]:
+                break
+            records.append(record)
+    except (EOFError, ValueError, OSError):
+        pass  # Truncated line or gzip member, keep what was read
+
+    # Rewrite the shard so appending continues from a clean end
+    tmp_path = shard_path + ".tmp" + (".gz" if shard_path.endswith(".gz") else "")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    with ShardWriter(tmp_path) as writer:
+        for record in records:
+            writer.write_page(record)
+    os.replace(tmp_path, shard_path)
+    return len(records), sum(len(r["annotations"]) for r in records)
@@ -0,0 +1,91 @@
+import os
+import gzip
+import json
+
+# Streaming, sharded COCO annotation writer.
+# Every finished page is appended to its shard as one JSON line:
+#   {"image": {"file_name": ..., "width": ..., "height": ...},
+#    "annotations": [{"category_id": ..., "bbox": [...], ...}, ...]}
+# so annotations survive a crash and memory does not grow with the run.
+# finalize_coco streams the shards into one standard COCO file and assigns the ids.
+
+def shard_file(shard_dir, index, compress=False):
+    return os.path.join(shard_dir, f"shard_{index:03d}.jsonl" + (".gz" if compress else ""))
+
+def _open_text(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class ShardWriter:
+    """Appends page records to a JSONL shard (gzip if the path ends with .gz) as pages finish."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = _open_text(path, "a")
+        self.pages = 0
+
+    def write_page(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        self.pages += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_shard(path):
+    """Yields the page records of a shard one at a time."""
+    with _open_text(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def finalize_coco(shard_paths, coco_template, coco_path, start_id=0):
+    """
+    Assembles the shards into one COCO file without loading them into memory.
+    Images are numbered in shard order, annotations likewise, both starting at start_id.
+
+    :param shard_paths: Shard files in page order.
+    :param coco_template: COCO dict providing info, licenses and categories.
+    :param coco_path: Output path of the COCO file.
+    :param start_id: First image and annotation id.
+    :returns: Number of images and annotations written.
+    """
+    num_images = 0
+    num_annotations = 0
+    tmp_path = coco_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        out.write("{\n")
+        for key, value in coco_template.items():
+            if key not in ("images", "annotations"):
+                out.write(f"{json.dumps(key)}: {json.dumps(value)},\n")
+
+        # First pass: images
+        out.write('"images": [')
+        for path in shard_paths:
+            for record in read_shard(path):
+                image = {"id": start_id + num_images, **record["image"]}
+                out.write(("," if num_images else "") + "\n" + json.dumps(image))
+                num_images += 1
+        out.write("\n],\n")
+
+        # Second pass: annotations, image ids follow the same order
+        out.write('"annotations": [')
+        image_id = start_id
+        for path in shard_paths:
+            for record in read_shard(path):
+                for ann in record["annotations"]:
+                    ann = {"id": start_id + num_annotations, "image_id": image_id, **ann}
+                    out.write(("," if num_annotations else "") + "\n" + json.dumps(ann))
+                    num_annotations += 1
+                image_id += 1
+        out.write("\n]\n}\n")
+    os.replace(tmp_path, coco_path)
+    return num_images, num_annotations
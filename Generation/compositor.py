@@ -0,0 +1,75 @@
+import numpy as np
+from PIL import Image
+
+# Page compositing on a preallocated buffer.
+# A worker keeps one uint8 numpy canvas per page size and resets it with a fill for every page
+# instead of allocating a new PIL page. A PIL image is mapped onto the same memory, so PIL
+# elements are pasted (and text drawn) straight into the buffer, numpy elements are copied in
+# as array slices, and the encoder reads the buffer without a copy. RGB pages are stored as
+# RGBX (4 bytes per pixel, PIL's own layout) so the mapping needs no conversion.
+
+# PIL mode of the mapped image and bytes per pixel of the buffer
+_LAYOUTS = {"RGB": ("RGBX", 4), "L": ("L", 1)}
+
+class PageCanvas:
+    def __init__(self, width, height, mode="RGB", fill=255):
+        """
+        :param width: Page width in pixels.
+        :param height: Page height in pixels.
+        :param mode: "RGB" or "L".
+        :param fill: Background value every reset fills the page with.
+        """
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.fill = fill
+        raw_mode, channels = _LAYOUTS[mode]
+        self.array = np.empty((height, width, channels), dtype=np.uint8)
+        self.page = Image.frombuffer(raw_mode, (width, height), self.array, "raw", raw_mode, 0, 1)
+        # frombuffer images are flagged read-only and would be copied on the first paste,
+        # the buffer is ours and writable so PIL may write into it
+        self.page.readonly = 0
+        self.reset()
+
+    def reset(self, fill=None):
+        """Fills the whole page with the background value (or `fill`) for the next page."""
+        self.array.fill(self.fill if fill is None else fill)
+
+    def paste(self, element, x, y):
+        """
+        Copies an element onto the page with its top-left corner at (x, y), clipped to the page.
+
+        :param element: PIL image, or uint8 array of shape (h, w) or (h, w, 3).
+        """
+        if isinstance(element, Image.Image):
+            if element.mode != self.mode:
+                element = element.convert(self.mode)
+            self.page.paste(element, (x, y))
+            return
+
+        h, w = element.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.width), min(y + h, self.height)
+        if x1 <= x0 or y1 <= y0:
+            return
+        src = element[y0 - y:y1 - y, x0 - x:x1 - x]
+        if src.ndim == 2:
+            src = src[..., None]
+        self.array[y0:y1, x0:x1, :src.shape[2]] = src
+
+    def image(self):
+        """The page as a PIL image on the canvas memory, valid until the next reset."""
+        return self.page
+
+# One canvas per worker process and page size
+_canvases = {}
+
+def page_canvas(width, height, mode="RGB", fill=255):
+    """Returns this process's canvas for the page size, reset for a new page."""
+    key = (width, height, mode)
+    canvas = _canvases.get(key)
+    if canvas is None:
+        canvas = _canvases[key] = PageCanvas(width, height, mode, fill)
+    else:
+        canvas.reset(fill)
+    return canvas
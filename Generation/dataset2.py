@@ -1,22 +1,18 @@
 import os
 import random
-import json
+import shutil
 from PIL import Image, ImageDraw
 from Text import generate_text_images
 from Image import get_random_images
 from Graph import generate_graphs
-import json5
+from coco_writer import ShardWriter, shard_file, finalize_coco
+from resources import load_config
 
 #Loading json file
-def load_config(config_path):
-    with open(config_path, "r") as f:
-        config = json5.load(f)  # json5 allows comments
-    return config
-config = load_config("Generation/config.json5")
+config = load_config()
 
 # Paths
 BASE_DIR = "dataset"
-os.makedirs(BASE_DIR, exist_ok=True)
 
 # Research paper page size
 PAGE_WIDTH = 1200
@@ -38,10 +34,7 @@ coco_template = {
     ]
 }
 
-# Initialize COCO data
-coco_data = coco_template.copy()
-
-def generate_research_page(page_id):
+def generate_research_page(page_id, writer, base_dir=BASE_DIR):
     """Generates a research paper-style page with a shadow effect, images, graphs, and text blocks."""
     
     shadow_offset = config["shadow_offset"]  # Offset for shadow
@@ -63,7 +56,6 @@ def generate_research_page(page_id):
     col_width = (PAGE_WIDTH - 2 * MARGIN) // NUM_COLUMNS
     elements = []
     coco_annotations = []
-    image_id = len(coco_data["images"]) + 1
     
     for row in range(NUM_ROWS):
         for col in range(NUM_COLUMNS):
@@ -97,8 +89,6 @@ def generate_research_page(page_id):
                 })
 
                 coco_annotations.append({
-                    "id": len(coco_data["annotations"]) + 1,
-                    "image_id": image_id,
                     "category_id": 1 if element_type == 0 else 2 if element_type == 2 else 3,
                     "bbox": list((x_position, y_position, width, height)),
                     "area": width * height,
@@ -108,28 +98,36 @@ def generate_research_page(page_id):
                 print(f"Error processing element: {e}")
                 continue
 
-    page_path = os.path.join(BASE_DIR, f"page_{page_id}.jpg")
+    page_path = os.path.join(base_dir, f"page_{page_id}.jpg")
     page.save(page_path)
     
-    coco_data["images"].append({
-        "id": image_id,
-        "file_name": f"page_{page_id}.jpg",
-        "width": PAGE_WIDTH,
-        "height": PAGE_HEIGHT
+    # Stream the page to the COCO shard, ids are assigned by finalize_coco
+    writer.write_page({
+        "image": {
+            "file_name": f"page_{page_id}.jpg",
+            "width": PAGE_WIDTH,
+            "height": PAGE_HEIGHT
+        },
+        "annotations": coco_annotations
     })
-    coco_data["annotations"].extend(coco_annotations)
 
-def generate_dataset(num_pages):
+def generate_dataset(num_pages, base_dir=BASE_DIR):
     """Generates a dataset of research paper-style images."""
-    for page_id in range(1, num_pages + 1):
-        print(f"Generating page {page_id}...")
-        generate_research_page(page_id)
+    os.makedirs(base_dir, exist_ok=True)
+    shard_dir = os.path.join(base_dir, "shards")
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    shard_path = shard_file(shard_dir, 0)
+    with ShardWriter(shard_path) as writer:
+        for page_id in range(1, num_pages + 1):
+            print(f"Generating page {page_id}...")
+            generate_research_page(page_id, writer, base_dir)
     
-    coco_path = os.path.join(BASE_DIR, "annotations.json")
-    with open(coco_path, "w") as f:
-        json.dump(coco_data, f, indent=4)
+    coco_path = os.path.join(base_dir, "annotations.json")
+    finalize_coco([shard_path], coco_template, coco_path, start_id=1)
+    shutil.rmtree(shard_dir)
     
     print(f"Dataset generated with {num_pages} pages. COCO annotations saved to {coco_path}.")
 
-# Generate dataset
-generate_dataset(10)  # Adjust the number of pages as needed
+if __name__ == "__main__":
+    # Generate dataset
+    generate_dataset(10)  # Adjust the number of pages as needed
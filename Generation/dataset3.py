@@ -1,34 +1,29 @@
 import os
 import random
-import json
-from PIL import Image, ImageDraw, ImageFont
-from Text import generate_text_images
-from Image import get_random_images
-from Graph1 import generate_graphs
-import json5
+from PIL import Image, ImageDraw
+from Text import render_text_images, placed_text_boxes, fit_font_size
+from Image import render_random_images, prefetch_random_images
+from Graph1 import render_graphs
+from engine import run_pages
+from asset_store import attach_stores
+from image_cache import write_level_store
+from text_source import prepare_text_source
+from checkpoint import atomic_save
+from compositor import page_canvas
+from fonts import get_font
+from page_random import child_rng
+from layout_stats import report_layouts
+from resources import load_config
+from functools import partial
+import argparse
 from PIL import Image, ImageFilter, ImageDraw, ImageCms, ImageEnhance
-import tempfile
+import io
 
-graph_counter = 0
-# Using for id in coco
-page_count = 0
-elem_count = 0
-fig_count = 1  # Global figure counter for captions
-
-try:
-    with open('Generation/corpus.txt', 'r') as f:
-        corpus_words = [line.strip() for line in f if line.strip()]
-except Exception:
-    corpus_words = ["Time", "Measurement", "Experiment", "Data", "Result"]
-
-if not corpus_words:
-    corpus_words = ["Time", "Measurement", "Experiment", "Data", "Result"]
-
-def apply_digital_artifacts(page, page_id):
-    """Digital-born PDF processing with error handling"""
+def apply_digital_artifacts(page, page_id, rng=random, mode="RGB"):
+    """Digital-born PDF processing with error handling, on "RGB" or single channel "L" pages"""
     try:
-        # Convert to RGB first
-        page = page.convert("RGB")
+        # Convert to the page mode first
+        page = page.convert(mode)
         
         # 1. Safe anti-aliasing
         page = page.filter(ImageFilter.SMOOTH_MORE)
@@ -36,28 +31,31 @@ def apply_digital_artifacts(page, page_id):
         # 2. Pixel noise with bounds checking
         pixels = page.load()
         for _ in range(int(0.002 * page.width * page.height)):
-            x = random.randint(0, page.width-1)
-            y = random.randint(0, page.height-1)
+            x = rng.randint(0, page.width-1)
+            y = rng.randint(0, page.height-1)
+            if mode == "L":
+                pixels[x, y] = min(255, max(0, pixels[x, y] + rng.randint(-3, 3)))
+                continue
             r, g, b = pixels[x, y]
             pixels[x, y] = (
-                min(255, max(0, r + random.randint(-3, 3))),
-                min(255, max(0, g + random.randint(-3, 3))),
-                min(255, max(0, b + random.randint(-3, 3)))
+                min(255, max(0, r + rng.randint(-3, 3))),
+                min(255, max(0, g + rng.randint(-3, 3))),
+                min(255, max(0, b + rng.randint(-3, 3)))
             )
 
         # 3. Safer PDF render simulation
-        if random.random() < 0.4:
+        if rng.random() < 0.4:
             page = page.transform(
                 page.size,
                 Image.AFFINE,
-                data=(1, random.uniform(-0.02, 0.02), 0,
-                      random.uniform(-0.02, 0.02), 1, 0),
+                data=(1, rng.uniform(-0.02, 0.02), 0,
+                      rng.uniform(-0.02, 0.02), 1, 0),
                 resample=Image.BILINEAR
             )
 
         # 4. CMS handling with fallback
         try:
-            if random.random() < 0.5:  # 50% chance
+            if rng.random() < 0.5 and mode == "RGB":  # 50% chance, gray pages have no color profile
                 srgb_profile = ImageCms.createProfile("sRGB")
                 page = ImageCms.profileToProfile(
                     page, 
@@ -68,35 +66,33 @@ def apply_digital_artifacts(page, page_id):
         except Exception as cms_error:
             print(f"Color profile error: {cms_error}")
 
-        # 5. JPEG compression fallback
+        # 5. JPEG compression round trip in memory
         try:
-            with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
-                page.save(tmp.name, quality=random.randint(85, 95))
-                tmp.close()  # Explicitly close before reopening
-                page = Image.open(tmp.name).convert("RGB")
-            os.unlink(tmp.name)  # Delete after processing
+            buffer = io.BytesIO()
+            page.save(buffer, format="JPEG", quality=rng.randint(85, 95))
+            buffer.seek(0)
+            page = Image.open(buffer).convert(mode)
         except Exception as compression_error:
             print(f"Compression failed: {compression_error}")
 
         # 6. Final adjustments
         enhancer = ImageEnhance.Sharpness(page)
-        return enhancer.enhance(random.uniform(0.95, 1.05))
+        return enhancer.enhance(rng.uniform(0.95, 1.05))
 
     except Exception as e:
         print(f"Artifact pipeline failed: {e}")
         return page  # Return original if errors occur
 
 # Loading json file
-
-def load_config(config_path):
-    with open(config_path, "r") as f:
-        config = json5.load(f)  # json5 allows comments
-    return config
-config = load_config("./Generation/dataset3_config.json5")
+config = load_config("dataset3_config.json5")
 
 # Paths
 BASE_DIR = "dataset"
-os.makedirs(BASE_DIR, exist_ok=True)
+# Elements are handed to the page in memory, set "debug_element_dir" to also dump them as JPEGs
+DEBUG_DIR = config.get("debug_element_dir")
+
+def debug_dir(kind):
+    return os.path.join(DEBUG_DIR, kind) if DEBUG_DIR else None
 
 # Research paper page size
 PAGE_WIDTH = config["PAGE_WIDTH"]
@@ -104,36 +100,59 @@ PAGE_HEIGHT = config["PAGE_HEIGHT"]
 MARGIN = config["MARGIN"]
 
 coco_template = config["coco_template"]
-coco_data = coco_template.copy()
 
-# Adds images to the coco data
-def add_image(image_id, file_name, width, height):
-    coco_data["images"].append({
-        "id": image_id,
+# PIL mode pages are rendered, composed and saved in, "RGB" or "L" (single channel)
+COLOR_MODE = config.get("color_mode", "RGB")
+
+# Source image folders of the figures
+SCIENCE_FOLDER = "generated_images"
+NON_SCIENCE_FOLDER = "Generation/non_science_images"
+# Decode the source images once into a store the workers map, instead of once per worker
+SHARED_ASSETS = config.get("shared_assets", False)
+# Smallest and largest figure images (without caption), rows are fit to the space left so figures can be tiny
+FIGURE_SIZES = ((1, 1), (max(config["max_pic_width"], config["max_pic_height"]), config["max_pic_height"]))
+
+# Line and word annotations of rendered text
+TEXT_BOXES = config.get("text_boxes", False)
+TEXT_BOX_CATEGORIES = {c["name"]: c["id"] for c in config["text_box_categories"]}
+if TEXT_BOXES:
+    coco_template = dict(coco_template, categories=coco_template["categories"] + config["text_box_categories"])
+
+# Child streams of a page: one per rendered element and one for the scan artifacts
+ELEMENT_STREAM = 1
+ARTIFACT_STREAM = 2
+
+# Builds the coco image entry of a page, the id is assigned when shards are merged
+def make_image(file_name, width, height):
+    return {
         "file_name": file_name,
         "width": width,
         "height": height,
         "license": 1,
         "date_captured": "2025-02-27T00:00:00+00:00"
-    })
-# Adds annotations to the coco data
-def add_annotation(annotation_id, image_id, category_id, bbox):
+    }
+# Builds a coco annotation of a page, ids are assigned when shards are merged
+def make_annotation(category_id, bbox):
     x, y, w, h = bbox
     area = w * h  # Calculate area
-    coco_data["annotations"].append({
-        "id": annotation_id,
-        "image_id": image_id,
+    return {
         "category_id": category_id,
-        "bbox": bbox,
+        "bbox": list(bbox),
         "area": area,
         "segmentation": [],
         "iscrowd": 0
-    })
+    }
+# Size of a bold row's font, at most the page's bold size and small enough for a line to fit the row
+def bold_font_size(font_path, font_bold, size):
+    if not config["fit_text"]:
+        return font_bold
+    return fit_font_size(font_path, size, bold=True, min_size=config["min_font_size"], max_size=font_bold)
+
 # Generates research paper rows
-def row_generater(PAGE_HEIGHT=PAGE_HEIGHT, min=300, max=500, MARGIN=50):
+def row_generater(PAGE_HEIGHT=PAGE_HEIGHT, min=300, max=500, MARGIN=50, rng=random):
     rows = [MARGIN]
     while rows[-1] < PAGE_HEIGHT - MARGIN:
-        next_row = random.randint(min, max) + rows[-1]
+        next_row = rng.randint(min, max) + rows[-1]
         if next_row > PAGE_HEIGHT - MARGIN:
             next_row = PAGE_HEIGHT - MARGIN
         rows.append(next_row)
@@ -142,31 +161,29 @@ def row_generater(PAGE_HEIGHT=PAGE_HEIGHT, min=300, max=500, MARGIN=50):
 # Generates single columns for text and n columns for graph and images
 # --- Changes inside generate_research_page_N_columns ---
 
-def generate_research_page_N_columns(page_id, n=config["N"]):
-    global page_count, elem_count, fig_count, corpus_words, graph_counter
-    # Blank Page
-    page = Image.new("RGB", (PAGE_WIDTH, PAGE_HEIGHT), "white")
-    draw = ImageDraw.Draw(page)
+def plan_research_page_N_columns(page_id, n=config["N"], rng=random):
+    """
+    Places the elements of one page without rendering anything.
+    Only the placement logic draws from `rng`, so the boxes are the same with or without rendering.
 
+    :returns: List of elements, each with its coco "type", "bbox" and what to render in it
+              ("kind" is "image", "graph", "text", "page_number" or None for the caption strip).
+    """
     # Generates Rows Randomly for each column
     rowss = []
     for i in range(0, n):
-        row = row_generater(PAGE_HEIGHT, config["min_row"], config["max_row"], MARGIN)
+        row = row_generater(PAGE_HEIGHT, config["min_row"], config["max_row"], MARGIN, rng)
         rowss.append(row)
 
     # Font for the page
     fonts = config["Fonts"]
-    font_path = random.choice(fonts)
-    font_size = random.randint(config["min_font_size"], config["max_font_size"])
-    font_bold = random.randint(30, 40)
+    font_path = rng.choice(fonts)
+    font_size = rng.randint(config["min_font_size"], config["max_font_size"])
+    font_bold = rng.randint(30, 40)
 
     # Elements to store all elements
     elements = []
 
-    # COCO Annotations
-    image_id = f"page_{page_id}.jpg"
-    add_image(page_count, image_id, config["PAGE_WIDTH"], config["PAGE_HEIGHT"])
-
     # Iterate over columns and rows
     for j in range(0, n):
         rows = rowss[j]
@@ -177,12 +194,12 @@ def generate_research_page_N_columns(page_id, n=config["N"]):
             WIDTH_LIMITS = [MARGIN + (j * ROW_WIDTH) + (j * config["col_offset"]),
                             MARGIN + ((j + 1) * ROW_WIDTH)]
             # 0 is image/graph and 2 is text
-            chosen_type = random.choices(['image', 'text'], weights=config["weights"])[0]
+            chosen_type = rng.choices(['image', 'text'], weights=config["weights"])[0]
 
             bold = False
             if ROW_HEIGHT < 150:
                 chosen_type = 'text'
-                bold = random.choices([True, False], weights=[70, 30])[0]
+                bold = rng.choices([True, False], weights=[70, 30])[0]
 
             if chosen_type == "image":  # Picture/Graph block
                 width_left = ROW_WIDTH
@@ -193,13 +210,13 @@ def generate_research_page_N_columns(page_id, n=config["N"]):
                 effective_height = ROW_HEIGHT - caption_reserved
 
                 if config["same_size"] == 1 and config["square"] == 1:
-                    pic_height = random.randint(min(effective_height, config["min_pic_height"]),
+                    pic_height = rng.randint(min(effective_height, config["min_pic_height"]),
                                                 min(effective_height, config["max_pic_height"]))
                     pic_width = pic_height
                 elif config["same_size"] == 1 and config["square"] != 1:
-                    pic_height = random.randint(min(effective_height, config["min_pic_height"]),
+                    pic_height = rng.randint(min(effective_height, config["min_pic_height"]),
                                                 min(effective_height, config["max_pic_height"]))
-                    pic_width = random.randint(min(ROW_WIDTH, config["min_pic_width"]),
+                    pic_width = rng.randint(min(ROW_WIDTH, config["min_pic_width"]),
                                                min(ROW_WIDTH, config["max_pic_width"]))
                 else:
                     print("Invalid Config")
@@ -208,18 +225,18 @@ def generate_research_page_N_columns(page_id, n=config["N"]):
                 while width_left > 0:
                     # If not same size or square, recalculate dimensions for variability.
                     if config["same_size"] != 1 and config["square"] == 1:
-                        pic_height = random.randint(min(effective_height, config["min_pic_height"]),
+                        pic_height = rng.randint(min(effective_height, config["min_pic_height"]),
                                                     min(effective_height, config["max_pic_height"]))
                         pic_width = pic_height
                     elif config["same_size"] != 1 and config["square"] != 1:
-                        pic_height = random.randint(min(effective_height, config["min_pic_height"]),
+                        pic_height = rng.randint(min(effective_height, config["min_pic_height"]),
                                                     min(effective_height, config["max_pic_height"]))
-                        pic_width = random.randint(min(ROW_WIDTH, config["min_pic_width"]),
+                        pic_width = rng.randint(min(ROW_WIDTH, config["min_pic_width"]),
                                                    min(ROW_WIDTH, config["max_pic_width"]))
                     pos_possible_vertical = effective_height - pic_height
                     pos_possible_horizontal = WIDTH_LIMITS[0] + ROW_WIDTH - width_left
                     if config["offset"] == 1:
-                        y_pos = HEIGHT_LIMITS[0] + random.randint(0, pos_possible_vertical)
+                        y_pos = HEIGHT_LIMITS[0] + rng.randint(0, pos_possible_vertical)
                         x_pos = pos_possible_horizontal
                         width_left -= pic_width
                         if width_left < 0:
@@ -234,60 +251,50 @@ def generate_research_page_N_columns(page_id, n=config["N"]):
                             break
 
                     # Decide between image and graph
-                    pic_type = random.choices(['image', 'graph'], weights=config["pic_weights"])[0]
+                    pic_type = rng.choices(['image', 'graph'], weights=config["pic_weights"])[0]
                     if pic_type == 'image':
                         element_type = 1
-                        image_path = get_random_images(num_images=1, image_sizes=[(pic_width, pic_height)],
-                                                       science_folder="generated_images",
-                                                       non_science_folder="Generation/non_science_images")[0]
                         caption_size = 20
                     else:
                         element_type = 0
-                        image_path = generate_graphs(1, [(pic_width, pic_height)])[0]
-                        graph_counter += 1
                         caption_size = 25
 
                     # Append the image/graph element
                     elements.append({
                         "type": element_type,
-                        "path": image_path,
+                        "kind": pic_type,
+                        "size": (pic_width, pic_height),
                         "bbox": (x_pos, y_pos, pic_width, pic_height-caption_size)
                     })
                     elements.append({
                         "type": 2,
-                        "path": None,
+                        "kind": None,
                         "bbox": (x_pos, y_pos + pic_height - caption_size, pic_width, caption_size)
                     })
 
             elif chosen_type == "text":  # Text element block
                 element_type = 2
-                text_height = random.randint(ROW_HEIGHT - config["min_hieght_reduce1"],
+                text_height = rng.randint(ROW_HEIGHT - config["min_hieght_reduce1"],
                                              ROW_HEIGHT - config["max_hieght_reduce1"])
-                text_width = random.randint(ROW_WIDTH - config["min_width_reduce1"],
+                text_width = rng.randint(ROW_WIDTH - config["min_width_reduce1"],
                                             ROW_WIDTH - config["max_width_reduce1"])
                 pos_possible_vertical = ROW_HEIGHT - text_height
                 pos_possible_horizontal = ROW_WIDTH - text_width
                 if config["offset"] == 1:
-                    y_pos = HEIGHT_LIMITS[0] + random.randint(0, pos_possible_vertical)
-                    x_pos = WIDTH_LIMITS[0] + random.randint(0, pos_possible_horizontal)
+                    y_pos = HEIGHT_LIMITS[0] + rng.randint(0, pos_possible_vertical)
+                    x_pos = WIDTH_LIMITS[0] + rng.randint(0, pos_possible_horizontal)
                 elif config["offset"] == 2:
                     print("Implementation Phase")
                 else:
                     y_pos = HEIGHT_LIMITS[0]
                     x_pos = WIDTH_LIMITS[0]
-                try:
-                    if not bold:
-                        image_path = generate_text_images(1, [(text_width, text_height)],
-                                                           font_path, font_size, bold=False)[0]
-                    else:
-                        image_path = generate_text_images(1, [(text_width, text_height)],
-                                                           font_path, font_bold, bold=True)[0]
-                except Exception as e:
-                    print(f"Error generating Text element: {e}")
-                    continue
                 elements.append({
                     "type": element_type,
-                    "path": image_path,
+                    "kind": "text",
+                    "size": (text_width, text_height),
+                    "font": font_path,
+                    "font_size": bold_font_size(font_path, font_bold, (text_width, text_height)) if bold else font_size,
+                    "bold": bold,
                     "bbox": (x_pos, y_pos, text_width, text_height)
                 })
             else:
@@ -297,62 +304,150 @@ def generate_research_page_N_columns(page_id, n=config["N"]):
     if config["page_number_position"] == "right":
         x_min = PAGE_WIDTH - 100
         y_min = PAGE_HEIGHT - MARGIN
-        elements.append(generate_page_number_image(page_id, x_min, y_min, font_size=14, font_path=font_path))
+        width, height = measure_page_number(page_id, font_size=14, font_path=font_path)
+        elements.append({
+            "type": 2,
+            "kind": "page_number",
+            "font": font_path,
+            "font_size": 14,
+            "bbox": (x_min, y_min, width, height)
+        })
 
     # --- NEW: Sort elements to ensure text elements (type 2) are pasted last ---
     # Sorting by type ensures that image/graph elements are drawn before text elements
-    elements = sorted(elements, key=lambda e: e["type"])
+    return sorted(elements, key=lambda e: e["type"])
+
+# Renders the content of one planned element, returns its element dict with the image under "image",
+# None for elements without content
+def render_element(elem, page_id, rng):
+    if elem["kind"] == "image":
+        return render_random_images(num_images=1, image_sizes=[elem["size"]],
+                                    science_folder=SCIENCE_FOLDER, non_science_folder=NON_SCIENCE_FOLDER,
+                                    debug_dir=debug_dir("image"), rng=rng, mode=COLOR_MODE)[0]
+    if elem["kind"] == "graph":
+        return render_graphs(1, [elem["size"]], debug_dir=debug_dir("graph"), rng=rng, mode=COLOR_MODE)[0]
+    if elem["kind"] == "text":
+        return render_text_images(1, [elem["size"]], elem["font"], elem["font_size"], bold=elem["bold"],
+                                  debug_dir=debug_dir("text"), rng=rng, mode=COLOR_MODE)[0]
+    if elem["kind"] == "page_number":
+        x_min, y_min = elem["bbox"][:2]
+        return generate_page_number_image(page_id, x_min, y_min, font_size=elem["font_size"], font_path=elem["font"],
+                                          output_dir=debug_dir("page"), mode=COLOR_MODE)
+    return None
+
+# Annotations of the lines and words of a text element pasted at (x, y)
+def text_box_annotations(element, x, y):
+    line_boxes, word_boxes = placed_text_boxes(element, x, y)
+    return ([make_annotation(TEXT_BOX_CATEGORIES["text_line"], bbox) for bbox in line_boxes] +
+            [make_annotation(TEXT_BOX_CATEGORIES["word"], bbox) for bbox in word_boxes])
+
+# Prefetches the source image of a planned image element, render_element picks it up
+def prefetch_element(elem, rng):
+    prefetch_random_images(1, [elem["size"]], science_folder=SCIENCE_FOLDER, non_science_folder=NON_SCIENCE_FOLDER,
+                           rng=rng, mode=COLOR_MODE)
+
+def generate_research_page_N_columns(page_id, n=config["N"], rng=random, dry_run=False, base_dir=BASE_DIR):
+    """
+    Renders and saves one page to base_dir drawing only from `rng`, returns its coco image entry and annotations.
+    With dry_run only the layout is computed: nothing is rendered or saved, the annotations are the same.
+    """
+    elements = plan_research_page_N_columns(page_id, n, rng)
+
+    # COCO Annotations
+    image_id = f"page_{page_id}.jpg"
+    record = {"image": make_image(image_id, config["PAGE_WIDTH"], config["PAGE_HEIGHT"]),
+              "annotations": []}
+    if dry_run:
+        record["annotations"] = [make_annotation(elem["type"], elem["bbox"]) for elem in elements]
+        return record
+
+    # Start decoding the page's figures in the background while graphs and text render
+    for k, elem in enumerate(elements):
+        if elem["kind"] == "image":
+            prefetch_element(elem, child_rng(rng, ELEMENT_STREAM, k))
+
+    # Blank Page, the worker's canvas reset to white
+    canvas = page_canvas(PAGE_WIDTH, PAGE_HEIGHT, COLOR_MODE)
 
     # Add all elements to the page and update the coco file
-    for elem in elements:
+    # Every element renders from its own child stream, so rendering never shifts the layout
+    for k, elem in enumerate(elements):
         try:
-            if elem["path"] !=None:
-                img = Image.open(elem["path"])
-                page.paste(img, (elem["bbox"][0], elem["bbox"][1]))
-            add_annotation(elem_count, page_count, elem["type"], elem["bbox"])
-            elem_count += 1
+            element = render_element(elem, page_id, child_rng(rng, ELEMENT_STREAM, k))
+            if element is not None:
+                canvas.paste(element["image"], elem["bbox"][0], elem["bbox"][1])
+            record["annotations"].append(make_annotation(elem["type"], elem["bbox"]))
+            if TEXT_BOXES and element is not None and "line_boxes" in element:
+                record["annotations"].extend(text_box_annotations(element, elem["bbox"][0], elem["bbox"][1]))
         except Exception as e:
-            print(f"Error placing element {elem['path']}: {e}")
+            print(f"Error placing element {elem['bbox']}: {e}")
 
     # Save the page
-    page_path = os.path.join(BASE_DIR, f"page_{page_id}.jpg")
-    processed_page = apply_digital_artifacts(page, page_id)
-    page_path = os.path.join(BASE_DIR, f"page_{page_id}.jpg")
-    processed_page.save(page_path, quality=100, subsampling=0, dpi=(300, 300))
-    page_count += 1
+    processed_page = apply_digital_artifacts(canvas.image(), page_id, child_rng(rng, ARTIFACT_STREAM), COLOR_MODE)
+    page_path = os.path.join(base_dir, f"page_{page_id}.jpg")
+    atomic_save(processed_page, page_path, quality=100, subsampling=0, dpi=(300, 300))
+    return record
+
+def _page_number_font(font_path, font_size):
+    return get_font(font_path, font_size)  # Falls back to an installed face if the font is missing
+
+# Size of the page number image, measured without rendering
+def measure_page_number(page_number, font_size=30, font_path="arial.ttf"):
+    font = _page_number_font(font_path, font_size)
+    bbox = font.getbbox(f"Page {page_number}")
+    text_width, text_height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    return text_width + 20, text_height + 10  # Add padding
 
 def generate_page_number_image(page_number, x_min, y_min, font_size=30, font_path="arial.ttf",
-                               text_color="black", bg_color="white", output_dir="Generation/page"):
+                               text_color="black", bg_color="white", output_dir=None, mode="RGB"):
     text = f"Page {page_number}"
-    try:
-        font = ImageFont.truetype(font_path, font_size)
-    except IOError:
-        font = ImageFont.load_default()  # Fallback if font is missing
-    dummy_img = Image.new("RGB", (1, 1))
-    draw = ImageDraw.Draw(dummy_img)
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width, text_height = bbox[2] - bbox[0], bbox[3] - bbox[1]
-    img = Image.new("RGB", (text_width + 20, text_height + 10), bg_color)  # Add padding
+    font = _page_number_font(font_path, font_size)
+    img = Image.new(mode, measure_page_number(page_number, font_size, font_path), bg_color)
     draw = ImageDraw.Draw(img)
     draw.text((10, 5), text, fill=text_color, font=font)
-    os.makedirs(output_dir, exist_ok=True)
-    image_path = os.path.join(output_dir, f"page_number_{page_number}.jpg")
-    img.save(image_path)
+    # Only written to disk when a debug output_dir is given
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        img.save(os.path.join(output_dir, f"page_number_{page_number}.jpg"))
     img_size = img.size
     return {"type": 2,
-            "path": image_path,
+            "image": img,
             "bbox": (x_min, y_min, img_size[0], img_size[1])
             }
 
-def generate_dataset(num_pages):
-    """Generates a dataset of research paper-style images."""
-    for page_id in range(1, num_pages + 1):
-        N = 2
-        print(f"Generating page {page_id}...")
-        generate_research_page_N_columns(page_id, n=(page_id % N) + 1)
-    coco_path = os.path.join(BASE_DIR, "annotations.json")
-    with open(coco_path, "w") as f:
-        json.dump(coco_data, f, indent=4)
+# Alternates between 1 and 2 columns
+def generate_page(page_id, rng, dry_run=False, base_dir=BASE_DIR):
+    N = 2
+    return generate_research_page_N_columns(page_id, n=(page_id % N) + 1, rng=rng, dry_run=dry_run, base_dir=base_dir)
+
+def generate_layouts(page_id, rng):
+    return generate_page(page_id, rng, dry_run=True)
+
+def generate_dataset(num_pages, workers=1, seed=0, compress=False, resume=False, layout_only=False, base_dir=BASE_DIR):
+    """Generates a dataset of research paper-style images in base_dir."""
+    if layout_only:
+        # Same boxes as a full run with this seed, without rendering a single pixel
+        report_layouts(generate_layouts, range(1, num_pages + 1), coco_template, os.path.join(base_dir, "layout"),
+                       workers, seed)
+        return
+    os.makedirs(base_dir, exist_ok=True)
+    prepare_text_source()
+    stores = None
+    if SHARED_ASSETS and workers > 1:
+        stores = [write_level_store(folder, COLOR_MODE, FIGURE_SIZES) for folder in (SCIENCE_FOLDER, NON_SCIENCE_FOLDER)]
+    coco_path = run_pages(partial(generate_page, base_dir=base_dir), range(1, num_pages + 1), coco_template, base_dir,
+                          workers, seed, compress, resume, initializer=attach_stores, initargs=(stores,))
     print(f"Dataset generated with {num_pages} pages. COCO annotations saved to {coco_path}.")
 
-generate_dataset(10)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate research paper pages with N columns")
+    parser.add_argument("--pages", type=int, default=10, help="Number of pages to generate")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="Run seed, every page draws from (seed, page id)")
+    parser.add_argument("--compress", action="store_true", help="Gzip the annotation shards")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run, skipping finished pages")
+    parser.add_argument("--layout-only", action="store_true",
+                        help="Only place elements and report box statistics, nothing is rendered")
+    parser.add_argument("--output", default=BASE_DIR, help="Dataset folder")
+    args = parser.parse_args()
+    generate_dataset(args.pages, args.workers, args.seed, args.compress, args.resume, args.layout_only, args.output)
@@ -1,26 +1,22 @@
 import os
 import random
 import json
+import copy
 from PIL import Image, ImageDraw, ImageFont
 from Text import generate_text_images
 from Image import get_random_images
 from Graph1 import generate_graphs
-import json5
+from resources import load_config
 
 #Using for id in coco
 page_count = 0
 elem_count = 0
 
 #Loading json file
-def load_config(config_path):
-    with open(config_path, "r") as f:
-        config = json5.load(f)  # json5 allows comments
-    return config
-config = load_config("./Generation/dataset3_config.json5")
+config = load_config("dataset3_config.json5")
 
 # Paths
 BASE_DIR = "dataset1"
-os.makedirs(BASE_DIR, exist_ok=True)
 
 # Research paper page size
 PAGE_WIDTH = config["PAGE_WIDTH"]
@@ -28,7 +24,7 @@ PAGE_HEIGHT = config["PAGE_HEIGHT"]
 MARGIN = config["MARGIN"]
 
 coco_template = config["coco_template"]
-coco_data = coco_template.copy()
+coco_data = copy.deepcopy(coco_template)  # The loaded config is shared, keep it untouched
 
 #Adds images to the coco data
 def add_image(image_id, file_name, width, height):
@@ -291,6 +287,7 @@ def generate_page_number_image(page_number, x_min, y_min,font_size=30, font_path
 
 def generate_dataset(num_pages):
     """Generates a dataset of research paper-style images."""
+    os.makedirs(BASE_DIR, exist_ok=True)
     for page_id in range(1, num_pages + 1):
         N = 2
         print(f"Generating page {page_id}...")
@@ -303,4 +300,5 @@ def generate_dataset(num_pages):
     
     print(f"Dataset generated with {num_pages} pages. COCO annotations saved to {coco_path}.")
 
-generate_dataset(5000)
\ No newline at end of file
+if __name__ == "__main__":
+    generate_dataset(5000)
\ No newline at end of file
@@ -1,44 +1,80 @@
 import os
 import random
-import json
-from PIL import Image, ImageDraw, ImageFont
-from Text import generate_text_images
-from Image import get_random_images
-from graphs1 import generate_graphs
-import json5
+from PIL import ImageDraw
+from Text import render_text_images, placed_text_boxes, fit_font_size
+from Image import render_random_images
+from graphs1 import render_graphs
+from engine import run_pages
+from asset_store import attach_stores
+from image_cache import write_level_store
+from checkpoint import atomic_save
+from compositor import page_canvas
+from fonts import get_font
+from page_random import child_rng, numpy_generator
+from layout_stats import report_layouts
+from resources import load_config, get_corpus
+from text_source import configured_text_source, prepare_text_source
+from functools import partial
+import argparse
 
 # Load configuration
-config = json5.load(open("./Generation/dataset3_config.json5"))
-CORPUS_FILE = "Generation/corpus.txt"
+config = load_config("dataset3_config.json5")
 BASE_DIR = "dataset"
+# Elements are handed to the page in memory, set "debug_element_dir" to also dump them as JPEGs
+DEBUG_DIR = config.get("debug_element_dir")
 
-# Initialize COCO dataset
-coco_data = config["coco_template"]
-coco_data["categories"] = [c for c in coco_data["categories"] if c["id"] in [0,1,2]]
+def debug_dir(kind):
+    return os.path.join(DEBUG_DIR, kind) if DEBUG_DIR else None
+
+# COCO template, only graph, image and text are generated here
+coco_template = dict(config["coco_template"],
+                     categories=[c for c in config["coco_template"]["categories"] if c["id"] in [0,1,2]])
+
+# PIL mode pages are rendered, composed and saved in, "RGB" or "L" (single channel)
+COLOR_MODE = config.get("color_mode", "RGB")
+
+# Source image folders of the figures
+SCIENCE_FOLDER = "Generation/science_images"
+NON_SCIENCE_FOLDER = "Generation/non_science_images"
+# Decode the source images once into a store the workers map, instead of once per worker
+SHARED_ASSETS = config.get("shared_assets", False)
+# Smallest and largest figure images (without caption), rows are fit to the space left so figures can be tiny
+FIGURE_SIZES = ((1, 1), (max(config["max_pic_width"], config["max_pic_height"]), config["max_pic_height"]))
+
+# Line and word annotations of rendered text
+TEXT_BOXES = config.get("text_boxes", False)
+TEXT_BOX_CATEGORIES = {c["name"]: c["id"] for c in config["text_box_categories"]}
+if TEXT_BOXES:
+    coco_template = dict(coco_template, categories=coco_template["categories"] + config["text_box_categories"])
+
+# Child stream of the page random stream that element k renders from, the layout keeps the page stream
+ELEMENT_STREAM = 1
 
 class ResearchPaperGenerator:
     def __init__(self):
-        self.page_count = 0
-        self.elem_count = 0
+        self.annotations = []
+        self.text_annotations = []
+        self.rng = random
+        self.dry_run = False
         self.current_font = None
         self.title_height = 100
-        self.corpus = self._load_corpus()
-        
-    def _load_corpus(self):
-        with open(CORPUS_FILE, "r") as f:
-            return [line.strip() for line in f if line.strip()]
+        self.corpus = get_corpus()
     
-    def _get_random_text(self, min_words=5, max_words=15):
-        num_words = random.randint(min_words, max_words)
-        return ' '.join(random.choices(self.corpus, k=num_words)).capitalize()
+    def _get_random_text(self, min_words=5, max_words=15, rng=random):
+        num_words = rng.randint(min_words, max_words)
+        source = configured_text_source()
+        if source is not None:
+            # Contiguous text from a sentence start, already capitalized
+            return source.sample_text(num_words, numpy_generator(rng))
+        return self.corpus.join(self.corpus.sample_ids(num_words, numpy_generator(rng))).capitalize()
 
     def _setup_page_style(self):
-        self.current_font = random.choice(config["Fonts"])
+        self.current_font = self.rng.choice(config["Fonts"])
         self.font_sizes = {
-            'title': random.randint(24, 28),
-            'header': random.randint(config["min_font_size"], config["max_font_size"]),
-            'body': random.randint(config["min_font_size"]-2, config["max_font_size"]-2),
-            'caption': random.randint(config["min_font_size"]-4, config["max_font_size"]-4)
+            'title': self.rng.randint(24, 28),
+            'header': self.rng.randint(config["min_font_size"], config["max_font_size"]),
+            'body': self.rng.randint(config["min_font_size"]-2, config["max_font_size"]-2),
+            'caption': self.rng.randint(config["min_font_size"]-4, config["max_font_size"]-4)
         }
 
     def _create_layout_grid(self, num_cols):
@@ -56,44 +92,72 @@ class ResearchPaperGenerator:
     def _fit_element(self, element_height, current_y):
         return min(element_height, self._calculate_available_space(current_y))
 
+    def _title_font_size(self, text, size):
+        # Fitted to the title box, the page's title size without fitting
+        if not config["fit_text"]:
+            return self.font_sizes['title']
+        return fit_font_size(self.current_font, size, text, bold=True, fill=config["fit_fill"],
+                             min_size=config["min_font_size"], max_size=config["max_fit_font_size"])
+
+    def _render_title(self, size, rng):
+        text = self._get_random_text(3, 8, rng)
+        return render_text_images(1, [size], self.current_font, self._title_font_size(text, size),
+                                  bold=True, text=text, debug_dir=debug_dir("text"), rng=rng, mode=COLOR_MODE)[0]
+
     def _add_title_section(self, page):
         title_width = config["PAGE_WIDTH"] - 2*config["MARGIN"]
-        title_img = generate_text_images(
-            1, [(title_width, self.title_height)],
-            self.current_font, self.font_sizes['title'],
-            bold=True, text=self._get_random_text(3, 8)
-        )[0]
-        self._place_element(page, title_img, 
+        self._place_element(page, 
                           (config["MARGIN"], config["MARGIN"], 
-                           title_width, self.title_height), 2)
+                           title_width, self.title_height), 2,
+                          lambda rng: self._render_title((title_width, self.title_height), rng))
+
+    def _place_element(self, page, bbox, category, render):
+        """
+        Annotates bbox and pastes the element there.
 
-    def _place_element(self, page, img_path, bbox, category):
+        :param render: Function taking the element's own random stream and returning its element dict
+                       (image under "image"), not called on a dry run so the layout never depends on rendering.
+        """
+        if self.dry_run:
+            self._add_coco_annotation(bbox, category)
+            return
         try:
-            img = Image.open(img_path)
-            page.paste(img, (bbox[0], bbox[1]))
+            element = render(child_rng(self.rng, ELEMENT_STREAM, len(self.annotations)))
+            page.paste(element["image"], bbox[0], bbox[1])
             self._add_coco_annotation(bbox, category)
+            if TEXT_BOXES and "line_boxes" in element:
+                self._add_text_boxes(element, bbox)
         except Exception as e:
             print(f"Error placing element: {e}")
 
     def _add_coco_annotation(self, bbox, category):
-        coco_data["annotations"].append({
-            "id": self.elem_count,
-            "image_id": self.page_count,
+        # Ids are assigned when the worker shards are merged
+        self.annotations.append({
             "category_id": category,
             "bbox": [bbox[0], bbox[1], bbox[2], bbox[3]],
             "area": bbox[2] * bbox[3],
             "segmentation": [],
             "iscrowd": 0
         })
-        self.elem_count += 1
+
+    def _add_text_boxes(self, element, bbox):
+        # Kept apart from the block annotations, whose count numbers the element streams and figures
+        line_boxes, word_boxes = placed_text_boxes(element, bbox[0], bbox[1])
+        for category, boxes in ((TEXT_BOX_CATEGORIES["text_line"], line_boxes), (TEXT_BOX_CATEGORIES["word"], word_boxes)):
+            for box in boxes:
+                self.text_annotations.append({
+                    "category_id": category,
+                    "bbox": box,
+                    "area": box[2] * box[3],
+                    "segmentation": [],
+                    "iscrowd": 0
+                })
 
     def _add_page_number(self, page, page_id):
-        try:
-            font = ImageFont.truetype(self.current_font, self.font_sizes['caption'])
-        except:
-            font = ImageFont.load_default()
-        
-        d = ImageDraw.Draw(page)
+        font = get_font(self.current_font, self.font_sizes['caption'])
+
+        # Drawn straight into the canvas memory
+        d = ImageDraw.Draw(page.image())
         footer_text = str(page_id)
         text_width = d.textlength(footer_text, font=font)
         x = min(
@@ -103,13 +167,22 @@ class ResearchPaperGenerator:
         y = config["PAGE_HEIGHT"] - config["MARGIN"] - 20
         d.text((x, y), footer_text, fill="black", font=font)
 
-    def generate_page(self, page_id):
-        page = Image.new("RGB", (config["PAGE_WIDTH"], config["PAGE_HEIGHT"]), "white")
+    def generate_page(self, page_id, rng=random, dry_run=False, base_dir=BASE_DIR):
+        """
+        Renders and saves one page to base_dir drawing only from `rng`, returns its coco image entry and annotations.
+        With dry_run=True only the layout is computed: the same boxes, nothing rendered or saved.
+        """
+        self.annotations = []
+        self.text_annotations = []
+        self.rng = rng
+        self.dry_run = dry_run
+        # The worker's canvas reset to white
+        page = None if dry_run else page_canvas(config["PAGE_WIDTH"], config["PAGE_HEIGHT"], COLOR_MODE)
         self._setup_page_style()
         self._add_title_section(page)
 
         # Column setup
-        num_cols = random.choice([1, 2] if config["N"] == 2 else [1])
+        num_cols = self.rng.choice([1, 2] if config["N"] == 2 else [1])
         columns = self._create_layout_grid(num_cols)
         y_pos = 2*config["MARGIN"] + self.title_height
 
@@ -122,7 +195,7 @@ class ResearchPaperGenerator:
                 if max_height < config["min_element_height"]:
                     break
 
-                element_type = random.choices(
+                element_type = self.rng.choices(
                     ['text', 'figure'], 
                     weights=config["weights"], 
                     k=1
@@ -130,90 +203,123 @@ class ResearchPaperGenerator:
                 
                 if element_type == 'text':
                     # Header check
-                    if random.random() < 0.3 and current_y == y_pos:
-                        header_img = generate_text_images(
-                            1, [(col_width, 40)],
-                            self.current_font, self.font_sizes['header'],
-                            text=self._get_random_text(1, 4), bold=True
-                        )[0]
-                        self._place_element(page, header_img, 
-                                          (x1, current_y, col_width, 40), 2)
+                    if self.rng.random() < 0.3 and current_y == y_pos:
+                        self._place_element(page, 
+                                          (x1, current_y, col_width, 40), 2,
+                                          lambda rng: render_text_images(
+                                              1, [(col_width, 40)],
+                                              self.current_font, self.font_sizes['header'],
+                                              text=self._get_random_text(1, 4, rng), bold=True,
+                                              debug_dir=debug_dir("text"), rng=rng, mode=COLOR_MODE
+                                          )[0])
                         current_y += 45
                         max_height = self._calculate_available_space(current_y)
 
                     text_height = self._fit_element(
-                        random.randint(config["min_row"], config["max_row"]),
+                        self.rng.randint(config["min_row"], config["max_row"]),
                         current_y
                     )
-                    text_img = generate_text_images(
-                        1, [(col_width, text_height)],
-                        self.current_font, self.font_sizes['body'],
-                        text=self._get_random_text(50, 200)
-                    )[0]
-                    self._place_element(page, text_img, 
-                                      (x1, current_y, col_width, text_height), 2)
+                    self._place_element(page, 
+                                      (x1, current_y, col_width, text_height), 2,
+                                      lambda rng: render_text_images(
+                                          1, [(col_width, text_height)],
+                                          self.current_font, self.font_sizes['body'],
+                                          text=self._get_random_text(50, 200, rng), debug_dir=debug_dir("text"), rng=rng, mode=COLOR_MODE
+                                      )[0])
                     current_y += text_height + config["element_spacing"]
                 
                 else:  # Figure element
                     fig_height = self._fit_element(
-                        random.randint(config["min_pic_height"], config["max_pic_height"]),
+                        self.rng.randint(config["min_pic_height"], config["max_pic_height"]),
                         current_y
                     )
-                    fig_width = fig_height if config["square"] else random.randint(
+                    fig_width = fig_height if config["square"] else self.rng.randint(
                         config["min_pic_width"], config["max_pic_width"])
                     fig_width = min(fig_width, col_width)
 
                     
                     if config["offset"]:
-                        x_offset = x1 + random.randint(0, max(0, col_width - fig_width)) 
+                        x_offset = x1 + self.rng.randint(0, max(0, col_width - fig_width)) 
                     else:
                         x_offset = x1
 
                     # Generate figure
-                    fig_type = random.choices(['image', 'graph'], 
+                    fig_type = self.rng.choices(['image', 'graph'], 
                                             weights=config["pic_weights"], k=1)[0]
-                    fig_img = (get_random_images(1, [(fig_width, fig_height)])[0] 
-                            if fig_type == 'image' else generate_graphs(1, [(fig_width, fig_height)])[0])
-                    
-                    self._place_element(page, fig_img, 
+                    self._place_element(page, 
                                       (x_offset, current_y, fig_width, fig_height), 
-                                      1 if fig_type == 'image' else 0)
+                                      1 if fig_type == 'image' else 0,
+                                      lambda rng: render_random_images(1, [(fig_width, fig_height)], science_folder=SCIENCE_FOLDER,
+                                                                       non_science_folder=NON_SCIENCE_FOLDER,
+                                                                       debug_dir=debug_dir("image"), rng=rng, mode=COLOR_MODE)[0]
+                                                  if fig_type == 'image' else
+                                                  render_graphs(1, [(fig_width, fig_height)], debug_dir=debug_dir("graph"), rng=rng, mode=COLOR_MODE)[0])
                     
                     # Add caption if space permits
                     caption_y = current_y + fig_height + 5
                     if caption_y < config["PAGE_HEIGHT"] - 35:
-                        caption_img = generate_text_images(
-                            1, [(fig_width, 30)],
-                            self.current_font, self.font_sizes['caption'],
-                            text=f"Fig. {self.elem_count}: {self._get_random_text(4, 8)}"
-                        )[0]
-                        self._place_element(page, caption_img, 
-                                          (x_offset, caption_y, fig_width, 30), 2)
+                        fig_number = len(self.annotations)
+                        self._place_element(page, 
+                                          (x_offset, caption_y, fig_width, 30), 2,
+                                          lambda rng: render_text_images(
+                                              1, [(fig_width, 30)],
+                                              self.current_font, self.font_sizes['caption'],
+                                              text=f"Fig. {fig_number}: {self._get_random_text(4, 8, rng)}",
+                                              debug_dir=debug_dir("text"), rng=rng, mode=COLOR_MODE
+                                          )[0])
 
                     current_y += fig_height + 40
 
-        self._add_page_number(page, page_id)
-        
-        # Save page
-        page.save(os.path.join(BASE_DIR, f"page_{page_id}.jpg"))
-        coco_data["images"].append({
-            "id": self.page_count,
-            "file_name": f"page_{page_id}.jpg",
-            "width": config["PAGE_WIDTH"],
-            "height": config["PAGE_HEIGHT"]
-        })
-        self.page_count += 1
+        if not dry_run:
+            self._add_page_number(page, page_id)
+            
+            # Save page
+            atomic_save(page.image(), os.path.join(base_dir, f"page_{page_id}.jpg"))
+        return {
+            "image": {
+                "file_name": f"page_{page_id}.jpg",
+                "width": config["PAGE_WIDTH"],
+                "height": config["PAGE_HEIGHT"]
+            },
+            "annotations": self.annotations + self.text_annotations
+        }
 
-def generate_dataset(num_pages):
-    os.makedirs(BASE_DIR, exist_ok=True)
-    generator = ResearchPaperGenerator()
-    
-    for page_id in range(num_pages):
-        print(f"Generating page {page_id}")
-        generator.generate_page(page_id)
-    
-    with open(os.path.join(BASE_DIR, "annotations.json"), "w") as f:
-        json.dump(coco_data, f)
+# One generator per worker process
+_generator = None
+
+def generate_page(page_id, rng, base_dir=BASE_DIR):
+    global _generator
+    if _generator is None:
+        _generator = ResearchPaperGenerator()
+    return _generator.generate_page(page_id, rng, base_dir=base_dir)
+
+def generate_layouts(page_id, rng):
+    global _generator
+    if _generator is None:
+        _generator = ResearchPaperGenerator()
+    return _generator.generate_page(page_id, rng, dry_run=True)
+
+def generate_dataset(num_pages, workers=1, seed=0, compress=False, resume=False, layout_only=False, base_dir=BASE_DIR):
+    if layout_only:
+        # Same seed, same boxes as a full run, written to base_dir/layout with per-class stats
+        report_layouts(generate_layouts, range(num_pages), coco_template, os.path.join(base_dir, "layout"), workers, seed)
+        return
+    os.makedirs(base_dir, exist_ok=True)
+    prepare_text_source()
+    stores = None
+    if SHARED_ASSETS and workers > 1:
+        stores = [write_level_store(folder, COLOR_MODE, FIGURE_SIZES) for folder in (SCIENCE_FOLDER, NON_SCIENCE_FOLDER)]
+    run_pages(partial(generate_page, base_dir=base_dir), range(num_pages), coco_template, base_dir,
+              workers, seed, compress, resume, initializer=attach_stores, initargs=(stores,))
 
 if __name__ == "__main__":
-    generate_dataset(10)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate research paper pages with a title section")
+    parser.add_argument("--pages", type=int, default=10, help="Number of pages to generate")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="Run seed, every page draws from (seed, page id)")
+    parser.add_argument("--compress", action="store_true", help="Gzip the annotation shards")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run, skipping finished pages")
+    parser.add_argument("--layout-only", action="store_true", help="Only compute layouts and annotation statistics, render nothing")
+    parser.add_argument("--output", default=BASE_DIR, help="Dataset folder")
+    args = parser.parse_args()
+    generate_dataset(args.pages, args.workers, args.seed, args.compress, args.resume, args.layout_only, args.output)
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from page_random import page_rng
+from coco_writer import ShardWriter, shard_file, finalize_coco
+from checkpoint import recover_shard, write_checkpoint, atomic_write_json, load_json, run_manifest_path
+
+# Multi-process page generation engine.
+# A page function renders and saves one page, drawing only from the random stream it is given,
+# and returns its record:
+#   {"image": {"file_name": ..., "width": ..., "height": ...},
+#    "annotations": [{"category_id": ..., "bbox": [...], ...}, ...]}
+# Records carry no ids. Ids are assigned when the shards are finalized, in page order,
+# so the COCO file is identical no matter how many workers rendered it.
+# Every page's stream is derived from (seed, page_id), so pages are identical as well.
+# With resume=True a crashed run continues from its checkpoints, see checkpoint.py.
+
+# Splits page ids into at most `workers` contiguous, disjoint ranges
+def split_page_ids(page_ids, workers):
+    page_ids = list(page_ids)
+    size, extra = divmod(len(page_ids), workers)
+    ranges = []
+    start = 0
+    for w in range(workers):
+        end = start + size + (1 if w < extra else 0)
+        if end > start:
+            ranges.append(page_ids[start:end])
+        start = end
+    return ranges
+
+# Renders one range of pages, streaming each record to the shard as soon as the page is saved
+# and checkpointing after every page
+def render_shard(page_fn, page_ids, shard_path, seed=0, resume=False, verbose=True):
+    pages_done, annotations = recover_shard(shard_path) if resume else (0, 0)
+    if pages_done:
+        print(f"Resuming {os.path.basename(shard_path)} after {pages_done} pages")
+    with ShardWriter(shard_path) as writer:
+        for page_id in page_ids[pages_done:]:
+            if verbose:
+                print(f"Generating page {page_id}...")
+            record = page_fn(page_id, page_rng(seed, page_id))
+            writer.write_page(record)
+            pages_done += 1
+            annotations += len(record["annotations"])
+            write_checkpoint(shard_path, seed, pages_done, page_id, annotations)
+    return shard_path
+
+def run_pages(page_fn, page_ids, coco_template, base_dir, workers=1, seed=0, compress=False, resume=False,
+              verbose=True, initializer=None, initargs=()):
+    """
+    Renders pages on a process pool and assembles the per-worker annotation shards.
+
+    :param page_fn: Picklable (module level) function taking (page_id, rng), rendering that page and returning its record.
+    :param page_ids: Page ids to render, in output order.
+    :param coco_template: COCO dict providing info, licenses and categories.
+    :param base_dir: Dataset folder, annotations.json is written there.
+    :param workers: Number of worker processes, 1 renders in the current process.
+    :param seed: Run seed, page k draws from page_rng(seed, k).
+    :param compress: Gzip the JSONL shards.
+    :param resume: Continue an interrupted run from the checkpoints in base_dir/shards.
+                   The shard layout of that run is kept, whatever the number of workers.
+    :param verbose: Print a line per page.
+    :param initializer: Picklable function run with `initargs` in every worker process before it renders,
+                        e.g. asset_store.attach_stores. Not run when rendering in the current process.
+    :returns: Path of the merged COCO file.
+    """
+    shard_dir = os.path.join(base_dir, "shards")
+    page_ids = list(page_ids)
+    manifest = load_json(run_manifest_path(shard_dir)) if resume else None
+    if manifest is not None:
+        if manifest["seed"] != seed or manifest["page_ids"] != page_ids:
+            raise ValueError("Cannot resume: seed or pages differ from the interrupted run")
+        ranges, compress = manifest["ranges"], manifest["compress"]
+    else:
+        shutil.rmtree(shard_dir, ignore_errors=True)  # Shards are appended to, drop those of an older run
+        os.makedirs(shard_dir, exist_ok=True)
+        ranges = split_page_ids(page_ids, max(1, workers))
+        atomic_write_json(run_manifest_path(shard_dir),
+                          {"seed": seed, "page_ids": page_ids, "ranges": ranges, "compress": compress})
+    shard_paths = [shard_file(shard_dir, i, compress) for i in range(len(ranges))]
+
+    if workers <= 1 or not ranges:
+        # No pool without pages, max_workers has to be positive
+        for ids, shard_path in zip(ranges, shard_paths):
+            render_shard(page_fn, ids, shard_path, seed, resume, verbose)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), initializer=initializer,
+                                 initargs=initargs) as pool:
+            list(pool.map(render_shard, [page_fn] * len(ranges), ranges, shard_paths,
+                          [seed] * len(ranges), [resume] * len(ranges), [verbose] * len(ranges)))
+
+    coco_path = os.path.join(base_dir, "annotations.json")
+    finalize_coco(shard_paths, coco_template, coco_path)
+    shutil.rmtree(shard_dir)
+    return coco_path
@@ -0,0 +1,115 @@
+import os
+from functools import lru_cache
+from PIL import ImageFont
+
+# Font resolution and a process-wide font cache.
+# Config names like "times.ttf" are resolved once per process against an index of the font
+# files installed on the machine. A name that is not installed (most Windows fonts on Linux)
+# falls back to an installed face of the same kind, serif or sans, and the fallback is
+# reported once. Loaded fonts are cached by (file, size), so text rendering never goes
+# through ImageFont.truetype or the missing-file exception path again.
+
+FONT_DIRS = [
+    os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    os.path.expanduser("~/.fonts"),
+    os.path.expanduser("~/.local/share/fonts"),
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+    os.path.expanduser("~/Library/Fonts")
+]
+
+# Name fragments of serif families, every other family falls back to a sans face
+SERIF_FAMILIES = ("times", "georgia", "garamond", "cambria", "palatino", "book", "serif")
+
+# Installed faces tried in order when a name is not found (matplotlib always ships DejaVu)
+FALLBACKS = {
+    ("serif", False): ["LiberationSerif-Regular.ttf", "DejaVuSerif.ttf", "FreeSerif.ttf"],
+    ("serif", True): ["LiberationSerif-Bold.ttf", "DejaVuSerif-Bold.ttf", "FreeSerifBold.ttf"],
+    ("sans", False): ["LiberationSans-Regular.ttf", "DejaVuSans.ttf", "FreeSans.ttf"],
+    ("sans", True): ["LiberationSans-Bold.ttf", "DejaVuSans-Bold.ttf", "FreeSansBold.ttf"]
+}
+
+def _font_dirs():
+    dirs = list(FONT_DIRS)
+    try:
+        import matplotlib
+        dirs.append(os.path.join(matplotlib.get_data_path(), "fonts", "ttf"))
+    except ImportError:
+        pass
+    return dirs
+
+@lru_cache(maxsize=None)
+def font_index():
+    """Lower-case file name -> path of every .ttf/.otf font installed, built once per process."""
+    index = {}
+    for font_dir in _font_dirs():
+        for root, _, files in os.walk(font_dir):
+            for name in files:
+                if name.lower().endswith((".ttf", ".otf")):
+                    index.setdefault(name.lower(), os.path.join(root, name))
+    return index
+
+def _find(name):
+    if os.path.isfile(name):
+        return name
+    return font_index().get(os.path.basename(name).lower())
+
+def _fallback(name, bold):
+    kind = "serif" if any(f in os.path.basename(name).lower() for f in SERIF_FAMILIES) else "sans"
+    for candidate in FALLBACKS[(kind, bold)]:
+        path = _find(candidate)
+        if path:
+            return path
+    return None
+
+@lru_cache(maxsize=None)
+def resolve_font(name):
+    """
+    Path of the font file for a config name such as "times.ttf", resolved once per process.
+
+    :returns: The installed file, else an installed face of the same kind, else None.
+    """
+    path = _find(name)
+    if path is None:
+        path = _fallback(name, bold=False)
+        print(f"Font {name} not found. Using {os.path.basename(path) if path else 'the default font'}.")
+    return path
+
+@lru_cache(maxsize=None)
+def resolve_bold_font(name):
+    """
+    Path of the bold variant of a font (timesbd.ttf, times-bold.ttf or Bold/times.ttf).
+    A font that is not installed gets the bold face of its fallback.
+
+    :returns: The bold file or None if there is none, in which case bold has to be faked.
+    """
+    regular = _find(name)
+    if regular is None:
+        return _fallback(name, bold=True)
+    variants = [
+        name.replace(".ttf", "bd.ttf"),  # Common pattern (timesbd.ttf)
+        name.replace(".ttf", "-bold.ttf"),  # Alternate pattern (times-bold.ttf)
+        os.path.join(os.path.dirname(regular), "Bold", os.path.basename(regular))  # Bold subfolder
+    ]
+    for variant in variants:
+        path = _find(variant)
+        if path:
+            return path
+    return None
+
+@lru_cache(maxsize=512)
+def _load(path, size):
+    if path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, size)
+
+def get_font(name, size, bold=False):
+    """
+    Cached font for a config name and size.
+
+    :param bold: Use the bold variant, the regular face if the font has none.
+    """
+    path = resolve_bold_font(name) if bold else None
+    return _load(path or resolve_font(name), size)
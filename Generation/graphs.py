@@ -1,16 +1,13 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import random
-from Text import load_corpus
+from resources import corpus_words
 import scipy.stats as stats
 
-# Sample words for random titles and labels
-CORPUS_FILE = "Generation/corpus.txt"
-words = load_corpus(CORPUS_FILE)
-
 def generate_random_text(word_count):
     """Generate a random title or label with a given number of words."""
-    return " ".join(random.sample(words, word_count))
+    # Sample words for random titles and labels
+    return " ".join(random.sample(corpus_words(), word_count))
 
 def generate_random_scatter():
     """Generates a research-style scatter plot with realistic formatting and randomized parameters."""
@@ -1,4 +1,5 @@
 import os
+import io
 import random
 from PIL import Image
 import numpy as np
@@ -6,26 +7,13 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from scipy.signal import savgol_filter
-
-random.seed(12345)
-np.random.seed(12345)
+from page_random import numpy_generator
+from resources import corpus_words
 
 graph_counter = 0
 # -----------------------------------------------------
-# Helper: Load corpus for labels and title words from corpus.txt
+# Labels and title words come from corpus.txt, loaded on first use (resources.corpus_words).
 # Each non-empty line is considered a candidate word/phrase.
-try:
-    with open('Generation/corpus.txt', 'r') as f:
-        corpus_words = [line.strip() for line in f if line.strip()]
-except Exception:
-    corpus_words = ["Time", "Measurement", "Experiment", "Data", "Result"]
-
-# For axis labels, if we have at least one word we use the corpus words.
-if len(corpus_words) == 0:
-    corpus_words = ["Time", "Measurement", "Experiment", "Data", "Result"]
-
-# Use the entire corpus as label pool
-label_pool = corpus_words
 
 # -----------------------------------------------------
 # Define a palette of academic-friendly colors and marker styles
@@ -61,9 +49,9 @@ formula_funcs = {
     'reciprocal_growth': lambda x: 3 + 5/(x+1 + 1e-6),
     'sawtooth': lambda x: ((x % 2) - 1),
     'oscillatory_growth': lambda x: x * np.sin(x/2),
-    'random_walk': lambda x: np.cumsum(np.random.randn(len(x))),
+    'random_walk': lambda x, g: np.cumsum(g.standard_normal(len(x))),
     'chaotic_map': lambda x: np.sin(x) + np.sin(3*x),
-    'fractal_noise': lambda x: np.interp(x, np.linspace(x.min(), x.max(), 10), np.random.rand(10)),
+    'fractal_noise': lambda x, g: np.interp(x, np.linspace(x.min(), x.max(), 10), g.random(10)),
     'bessel': lambda x: np.where(np.abs(x)<1e-8, 1, np.sin(x)/x),
     'step_function': lambda x: np.where(x > 5, 1, 0),
     'polynomial': lambda x: 0.05 * x**3 - 0.5 * x**2 + x,
@@ -153,13 +141,20 @@ eq_map = {
     'sigmoid_variant': r'$y = \frac{4}{1+e^{-0.02x}}-2$'
 }
 
+# Formulas drawing their own noise take the numpy generator as a second argument
+STOCHASTIC_FORMULAS = {'random_walk', 'fractal_noise'}
+
+def eval_formula(formula_name, func, x, g):
+    return func(x, g) if formula_name in STOCHASTIC_FORMULAS else func(x)
+
 # -----------------------------------------------------
-def weighted_n_points():
+def weighted_n_points(rng=random):
     """
     Select a random integer between 10 and 100.
     Numbers in the range 10-20 have the highest weight.
     For every additional 20 in range, the weight reduces by 10%.
     """
+    g = numpy_generator(rng)
     candidates = np.arange(10, 101)
     weights = []
     for n in candidates:
@@ -176,9 +171,9 @@ def weighted_n_points():
         weights.append(weight)
     weights = np.array(weights)
     probabilities = weights / weights.sum()
-    return int(np.random.choice(candidates, p=probabilities))
+    return int(g.choice(candidates, p=probabilities))
 
-def generate_journal_scatter_plot():
+def generate_journal_scatter_plot(rng=random):
     """
     Generate an academic-style scatter plot with these features:
       1. For each scatter group, choose an independent random x-range from [-200, 2000] with at least a 15-unit range.
@@ -187,57 +182,57 @@ def generate_journal_scatter_plot():
       4. Each group is plotted as a scatter, with markers, color, and optionally can include a smoothing overlay.
       5. The plot title is built from 1 to 5 random words drawn from the corpus.
     """
-    # --- Seeding for reproducibility ---
+    g = numpy_generator(rng)
     fig, ax = plt.subplots(figsize=(6, 4))
     
     # --- Choose a random formula for generating an underlying trend.
     # For scatter plots, we show the points along that trend (plus noise).
-    formula_name, func = random.choice(list(formula_funcs.items()))
+    formula_name, func = rng.choice(list(formula_funcs.items()))
     
     # --- Choose number of scatter groups (1 to 3) ---
-    n_groups = random.randint(1, 3)
+    n_groups = rng.randint(1, 3)
     
     # For each scatter group generate its own x, y values.
     for i in range(n_groups):
         # Random x-range: choose min_x and ensure diff >= 15 and max_x <= 2000.
-        min_x = random.uniform(-200, 1985)
-        diff = random.uniform(15, 2000 - min_x)
+        min_x = rng.uniform(-200, 1985)
+        diff = rng.uniform(15, 2000 - min_x)
         max_x = min_x + diff
         
-        n_points = weighted_n_points()
+        n_points = weighted_n_points(rng)
         x = np.linspace(min_x, max_x, n_points)
         
         # Underlying trend plus noise
-        base_trend = func(x)
-        noise_scale = random.uniform(0.05, 0.2)
-        noise = np.random.normal(0, noise_scale * np.abs(base_trend) + 0.01, x.shape)
+        base_trend = eval_formula(formula_name, func, x, g)
+        noise_scale = rng.uniform(0.05, 0.2)
+        noise = g.normal(0, noise_scale * np.abs(base_trend) + 0.01, x.shape)
         y = base_trend + noise
         
         # --- Variation mode for scatter group (0: raw scatter, 1: scatter with error bars,
         #     2: scatter with smoothing overlay, 3: scatter with both smoothing and error bars) ---
-        variation_mode = random.randint(0, 3)
+        variation_mode = rng.randint(0, 3)
         
         # Always add markers for scatter
-        marker_style = random.choice(MARKERS)
-        scatter_color = random.choice(RESEARCH_COLORS)
+        marker_style = rng.choice(MARKERS)
+        scatter_color = rng.choice(RESEARCH_COLORS)
         scatter_config = {
             'c': scatter_color,
-            's': random.uniform(30, 100),
-            'alpha': random.uniform(0.7, 0.95),
+            's': rng.uniform(30, 100),
+            'alpha': rng.uniform(0.7, 0.95),
             'marker': marker_style,
         }
         ax.scatter(x, y, **scatter_config)
         
         # Variation: Optionally add error bars (using vertical error bars)
         if variation_mode in [1, 3]:
-            error = 0.1 * np.abs(y) * np.random.uniform(0.5, 1.5, y.shape)
+            error = 0.1 * np.abs(y) * g.uniform(0.5, 1.5, y.shape)
             ax.errorbar(x, y, yerr=error, fmt='none', ecolor=scatter_color, alpha=0.3)
         
         # Variation: Optionally add smoothing overlay on the scatter
         if variation_mode in [2, 3]:
             possible_windows = [w for w in range(3, min(10, n_points+1)) if w % 2 == 1]
             if possible_windows:
-                window_size = random.choice(possible_windows)
+                window_size = rng.choice(possible_windows)
                 try:
                     smooth_y = savgol_filter(y, window_size, 3)
                     ax.plot(x, smooth_y, color='black', linestyle='--', linewidth=1.2,
@@ -247,15 +242,15 @@ def generate_journal_scatter_plot():
     
     # --- Set axis labels using random words from the corpus ---
     
-    xlabel = random.choice(label_pool)
-    ylabel = random.choice(label_pool)
-    if random.random() < 0.5:
+    xlabel = rng.choice(corpus_words())
+    ylabel = rng.choice(corpus_words())
+    if rng.random() < 0.5:
         ax.set_xlabel(xlabel)
         ax.set_ylabel(ylabel)
     
     # --- Build title from 1 to 5 random words from corpus ---
-    num_title_words = random.randint(1, 5)
-    title_words = random.sample(corpus_words, min(num_title_words, len(corpus_words)))
+    num_title_words = rng.randint(1, 5)
+    title_words = rng.sample(corpus_words(), min(num_title_words, len(corpus_words())))
     title_text = " ".join(title_words)
     ax.set_title(f"{title_text}: {formula_name}", pad=12, fontweight='bold')
     
@@ -266,7 +261,7 @@ def generate_journal_scatter_plot():
             fontsize=10,
             bbox=dict(facecolor='white', edgecolor='none', pad=2))
     
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         ax.grid(True, linestyle='--', alpha=0.3)
     
     plt.tight_layout()
@@ -276,7 +271,7 @@ def generate_journal_scatter_plot():
 # Example usage:
 
 # -----------------------------------------------------
-def generate_journal_line_plot():
+def generate_journal_line_plot(rng=random):
     """
     Generate an academic-style plot with the following features:
       1. For each line, the x-range is chosen randomly from [-200, 2000] such that 
@@ -286,55 +281,55 @@ def generate_journal_line_plot():
       4. 1 to 3 lines are plotted; each line uses its own randomly selected x values.
       5. The plot title is built from 1 to 5 random words chosen from the corpus.
     """
-
+    g = numpy_generator(rng)
     fig, ax = plt.subplots(figsize=(6, 4))
 
     # 20% chance for overall shadow effect on all lines
-    add_graph_shadow = random.random() < 0.2
+    add_graph_shadow = rng.random() < 0.2
 
     # --- Choose a random formula from the 50 defined ---
-    formula_name, func = random.choice(list(formula_funcs.items()))
+    formula_name, func = rng.choice(list(formula_funcs.items()))
 
     # --- Number of lines (1-3) ---
-    n_lines = random.randint(1, 2)
+    n_lines = rng.randint(1, 2)
 
     # --- Plot each line independently ---
     for i in range(n_lines):
         # For each line, choose its own x-range:
         # Select a random min_x from -200 to 1985 so that at least 15 is available
-        min_x = random.uniform(-200, 1985)
+        min_x = rng.uniform(-200, 1985)
         # Select a difference between 15 and (2000 - min_x)
-        diff = random.uniform(15, 2000 - min_x)
+        diff = rng.uniform(15, 2000 - min_x)
         max_x = min_x + diff
 
         # Determine weighted number of points
-        n_points = weighted_n_points()
+        n_points = weighted_n_points(rng)
         x = np.linspace(min_x, max_x, n_points)
         
         # Compute the base trend
-        base_trend = func(x)
+        base_trend = eval_formula(formula_name, func, x, g)
         # Add controlled noise proportional to the signal's magnitude
-        noise_scale = random.uniform(0.05, 0.2)
-        noise = np.random.normal(0, noise_scale * np.abs(base_trend) + 0.01, x.shape)
+        noise_scale = rng.uniform(0.05, 0.2)
+        noise = g.normal(0, noise_scale * np.abs(base_trend) + 0.01, x.shape)
         y = base_trend + noise
 
         # --- Variation mode (per line) from 0 to 3 ---
-        variation_mode = random.randint(0, 3)
+        variation_mode = rng.randint(0, 3)
 
         # --- 50% chance for markers ---
-        add_marker = random.random() < 0.5
-        marker_style = random.choice(MARKERS) if add_marker else None
+        add_marker = rng.random() < 0.5
+        marker_style = rng.choice(MARKERS) if add_marker else None
 
         # Line configuration
-        line_color = random.choice(RESEARCH_COLORS)
+        line_color = rng.choice(RESEARCH_COLORS)
         line_config = {
             'color': line_color,
-            'linewidth': random.uniform(1.2, 1.8),
-            'alpha': random.uniform(0.8, 0.95),
+            'linewidth': rng.uniform(1.2, 1.8),
+            'alpha': rng.uniform(0.8, 0.95),
         }
         if marker_style:
             line_config['marker'] = marker_style
-            line_config['markersize'] = random.uniform(4, 8)
+            line_config['markersize'] = rng.uniform(4, 8)
 
         # --- Optional shadow effect per line (if graph shadow is enabled) ---
         if add_graph_shadow:
@@ -351,7 +346,7 @@ def generate_journal_line_plot():
 
         # --- Variation 1 & 3: Add error bands to this line ---
         if variation_mode in [1, 3]:
-            error = 0.1 * np.abs(y) * np.random.uniform(0.5, 1.5, y.shape)
+            error = 0.1 * np.abs(y) * g.uniform(0.5, 1.5, y.shape)
             ax.fill_between(x, y - error, y + error,
                             color=line_color,
                             alpha=0.2)
@@ -361,7 +356,7 @@ def generate_journal_line_plot():
             # Choose an odd window size between 3 and min(9, n_points)
             possible_windows = [w for w in range(3, min(10, n_points+1)) if w % 2 == 1]
             if possible_windows:
-                window_size = random.choice(possible_windows)
+                window_size = rng.choice(possible_windows)
                 try:
                     smooth_y = savgol_filter(y, window_size, 3)
                     ax.plot(x, smooth_y, color='black', linestyle='--', linewidth=1.2,
@@ -370,15 +365,15 @@ def generate_journal_line_plot():
                     print("Smoothing failed:", e)
 
     # --- Set axis labels using random words from the corpus ---
-    xlabel = random.choice(label_pool)
-    ylabel = random.choice(label_pool)
-    if random.random() < 0.5:
+    xlabel = rng.choice(corpus_words())
+    ylabel = rng.choice(corpus_words())
+    if rng.random() < 0.5:
         ax.set_xlabel(xlabel)
         ax.set_ylabel(ylabel)
 
     # --- Build title from 1 to 5 random words from corpus ---
-    num_title_words = random.randint(1, 5)
-    title_words = random.sample(corpus_words, min(num_title_words, len(corpus_words)))
+    num_title_words = rng.randint(1, 5)
+    title_words = rng.sample(corpus_words(), min(num_title_words, len(corpus_words())))
     title_text = " ".join(title_words)
     # Append formula name for clarity
     ax.set_title(f"{title_text}: {formula_name}", pad=12, fontweight='bold')
@@ -391,14 +386,14 @@ def generate_journal_line_plot():
             bbox=dict(facecolor='white', edgecolor='none', pad=2))
 
     
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         ax.grid(True, linestyle='--', alpha=0.3)
 
     plt.tight_layout()
     return fig
 
 
-def generate_journal_bar_plot():
+def generate_journal_bar_plot(rng=random):
     """
     Generate an academic-style bar plot with these features:
       1. 5 to 15 groups on the x-axis.  
@@ -415,13 +410,13 @@ def generate_journal_bar_plot():
     """
     
     # Randomly choose the number of groups: between 5 and 15
-    n_groups = random.randint(5, 15)
+    n_groups = rng.randint(5, 15)
     
     # Random y-axis limit: integer between 100 and 10,000.
-    y_lim = random.randint(100, 10000)
+    y_lim = rng.randint(100, 10000)
     
     # Randomly choose layout: "grouped" or "stacked"
-    layout_type = random.choice(["grouped", "stacked"])
+    layout_type = rng.choice(["grouped", "stacked"])
     
     fig, ax = plt.subplots(figsize=(8, 5))
     
@@ -430,13 +425,13 @@ def generate_journal_bar_plot():
     
     # For side-by-side layout: use a fixed number of bars (between 1 and 3) for all groups
     if layout_type == "grouped":
-        fixed_n_bars = random.randint(1, 3)
+        fixed_n_bars = rng.randint(1, 3)
         # For a consistent color pattern across groups, select a color pattern for fixed_n_bars
         if fixed_n_bars == 1:
-            fixed_color_pattern = [random.choice(RESEARCH_COLORS)]
+            fixed_color_pattern = [rng.choice(RESEARCH_COLORS)]
         else:
-            # Pick distinct colors; if insufficient, random.sample ensures uniqueness.
-            fixed_color_pattern = random.sample(RESEARCH_COLORS, fixed_n_bars)
+            # Pick distinct colors; if insufficient, sample ensures uniqueness.
+            fixed_color_pattern = rng.sample(RESEARCH_COLORS, fixed_n_bars)
         
         bar_width_total = 0.8
         individual_width = bar_width_total / fixed_n_bars
@@ -446,7 +441,7 @@ def generate_journal_bar_plot():
         
         for i in range(n_groups):
             # Each group gets fixed_n_bars random heights
-            heights = [random.randint(100, y_lim) for _ in range(fixed_n_bars)]
+            heights = [rng.randint(100, y_lim) for _ in range(fixed_n_bars)]
             # In grouped layout, we place bars side by side.
             # Compute offsets to center the set around the group position.
             offsets = np.linspace(-bar_width_total/2 + individual_width/2,
@@ -454,55 +449,55 @@ def generate_journal_bar_plot():
                                   fixed_n_bars)
             for j, (h, offset) in enumerate(zip(heights, offsets)):
                 ax.bar(group_positions[i] + offset, h, width=individual_width * 0.9,
-                       color=fixed_color_pattern[j], alpha=random.uniform(0.8, 0.95))
+                       color=fixed_color_pattern[j], alpha=rng.uniform(0.8, 0.95))
             # Generate group label: 80% chance using a random word from corpus, else a random number.
-            if random.random() < 0.8:
-                label = random.choice(label_pool)
+            if rng.random() < 0.8:
+                label = rng.choice(corpus_words())
             else:
-                label = str(random.randint(0, 100))
+                label = str(rng.randint(0, 100))
             x_labels.append(label)
     
     else:  # stacked layout
         # For stacked layout, choose between Option A (fixed bars, same pattern for all groups) and Option B (varying groups)
-        stacked_option = random.choice(["A", "B"])
+        stacked_option = rng.choice(["A", "B"])
         x_labels = []
         bar_width = 0.8
         for i in range(n_groups):
             if stacked_option == "A":
                 # Option A: fixed number of bars for all groups
-                fixed_n_bars = random.randint(1, 3) if i == 0 else fixed_n_bars  # set once
+                fixed_n_bars = rng.randint(1, 3) if i == 0 else fixed_n_bars  # set once
                 if i == 0:
                     if fixed_n_bars == 1:
-                        fixed_color_pattern = [random.choice(RESEARCH_COLORS)]
+                        fixed_color_pattern = [rng.choice(RESEARCH_COLORS)]
                     else:
-                        fixed_color_pattern = random.sample(RESEARCH_COLORS, fixed_n_bars)
+                        fixed_color_pattern = rng.sample(RESEARCH_COLORS, fixed_n_bars)
                 n_bars = fixed_n_bars
                 # Generate n_bars random heights for this group
-                heights = [random.randint(100, y_lim) for _ in range(n_bars)]
+                heights = [rng.randint(100, y_lim) for _ in range(n_bars)]
                 bottom = 0
                 for h, col in zip(heights, fixed_color_pattern):
                     ax.bar(group_positions[i], h, bottom=bottom, width=bar_width * 0.8,
-                           color=col, alpha=random.uniform(0.8, 0.95))
+                           color=col, alpha=rng.uniform(0.8, 0.95))
                     bottom += h
             else:
                 # Option B: each group can have a different number of bars and its own color pattern.
-                n_bars = random.randint(1, 3)
-                heights = [random.randint(100, y_lim) for _ in range(n_bars)]
+                n_bars = rng.randint(1, 3)
+                heights = [rng.randint(100, y_lim) for _ in range(n_bars)]
                 # For this group, choose a color pattern (if multiple bars, use distinct colors)
                 if n_bars == 1:
-                    group_colors = [random.choice(RESEARCH_COLORS)]
+                    group_colors = [rng.choice(RESEARCH_COLORS)]
                 else:
-                    group_colors = random.sample(RESEARCH_COLORS, n_bars)
+                    group_colors = rng.sample(RESEARCH_COLORS, n_bars)
                 bottom = 0
                 for h, col in zip(heights, group_colors):
                     ax.bar(group_positions[i], h, bottom=bottom, width=bar_width * 0.8,
-                           color=col, alpha=random.uniform(0.8, 0.95))
+                           color=col, alpha=rng.uniform(0.8, 0.95))
                     bottom += h
             # Generate group label for each group (80% chance word; else, number)
-            if random.random() < 0.8:
-                label = random.choice(label_pool)
+            if rng.random() < 0.8:
+                label = rng.choice(corpus_words())
             else:
-                label = str(random.randint(0, 100))
+                label = str(rng.randint(0, 100))
             x_labels.append(label)
     
     # Set x ticks and labels
@@ -514,26 +509,26 @@ def generate_journal_bar_plot():
     ax.set_ylim(0, max(y_lim, current_ylim))
     
     # Random axis labels from the corpus
-    xlabel = random.choice(label_pool)
-    ylabel = random.choice(label_pool)
-    if random.random() < 0.5:
+    xlabel = rng.choice(corpus_words())
+    ylabel = rng.choice(corpus_words())
+    if rng.random() < 0.5:
         ax.set_xlabel(xlabel)
         ax.set_ylabel(ylabel)
     
     # Build title: select 1 to 5 random words from corpus.
-    num_title_words = random.randint(1, 5)
-    title_words = random.sample(corpus_words, min(num_title_words, len(corpus_words)))
+    num_title_words = rng.randint(1, 5)
+    title_words = rng.sample(corpus_words(), min(num_title_words, len(corpus_words())))
     title_text = " ".join(title_words)
     ax.set_title(f"{title_text}: {layout_type.capitalize()} Bar Chart", pad=12, fontweight='bold')
     
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         ax.grid(True, linestyle='--', alpha=0.3)
     
     plt.tight_layout()
     return fig
 
 # -----------------------------------------------------
-def generate_journal_pie_plot():
+def generate_journal_pie_plot(rng=random):
     """
     Generate an academic-style pie chart with the following features:
       1. The number of parts is randomly chosen from 1 to 10.
@@ -545,42 +540,42 @@ def generate_journal_pie_plot():
 """
     
     # 1. Determine number of parts (slices)
-    n_parts = random.randint(2, 10)
+    n_parts = rng.randint(2, 10)
     
     # 5. Generate values for each part: random integers in [1, 1000]
-    values = [random.randint(1, 1000) for _ in range(n_parts)]
+    values = [rng.randint(1, 1000) for _ in range(n_parts)]
     
     # 2. Set up the explosion ("poking out") configuration.
     # Randomly decide how many slices (0 to 3) will be exploded.
-    num_exploded = random.randint(0, min(3, n_parts))
+    num_exploded = rng.randint(0, min(3, n_parts))
     # Initialize all explodes to 0
     explode = [0] * n_parts
     if num_exploded > 0:
         # Randomly select indices to explode
-        exploded_indices = random.sample(range(n_parts), num_exploded)
+        exploded_indices = rng.sample(range(n_parts), num_exploded)
         # Set a uniform explosion value (e.g., 0.1 or 0.15)
         for idx in exploded_indices:
             explode[idx] = 0.1
     
     # 3. For each part, choose a label from the corpus.
-    labels = [random.choice(label_pool) for _ in range(n_parts)]
+    labels = [rng.choice(corpus_words()) for _ in range(n_parts)]
     
     # 4. 50% chance to include autopct (percentage annotations) on the pie.
-    autopct_value = '%1.1f%%' if random.random() < 0.5 else None
+    autopct_value = '%1.1f%%' if rng.random() < 0.5 else None
     
     # 6. Determine colors for the slices.
     # With 5% chance, use the same color for all slices.
-    if random.random() < 0.05:
-        color_choice = random.choice(RESEARCH_COLORS)
+    if rng.random() < 0.05:
+        color_choice = rng.choice(RESEARCH_COLORS)
         colors = [color_choice] * n_parts
     else:
         # Otherwise, try to use distinct colors.
         if n_parts <= len(RESEARCH_COLORS):
-            colors = random.sample(RESEARCH_COLORS, n_parts)
+            colors = rng.sample(RESEARCH_COLORS, n_parts)
         else:
             # If more parts than available colors, use distinct colors as far as possible
-            colors = random.sample(RESEARCH_COLORS, len(RESEARCH_COLORS))
-            colors += random.choices(RESEARCH_COLORS, k=n_parts - len(RESEARCH_COLORS))
+            colors = rng.sample(RESEARCH_COLORS, len(RESEARCH_COLORS))
+            colors += rng.choices(RESEARCH_COLORS, k=n_parts - len(RESEARCH_COLORS))
     
     # Create the pie chart figure.
     fig, ax = plt.subplots(figsize=(6, 6))
@@ -592,7 +587,7 @@ def generate_journal_pie_plot():
         autopct=autopct_value,
         colors=colors,
         shadow=False,
-        startangle=random.randint(0, 360)
+        startangle=rng.randint(0, 360)
     )
         plt.setp(autotexts, size=10, weight="bold")
     else:
@@ -602,7 +597,7 @@ def generate_journal_pie_plot():
         labels=labels,
         colors=colors,
         shadow=False,
-        startangle=random.randint(0, 360)
+        startangle=rng.randint(0, 360)
     )
 
     
@@ -612,17 +607,17 @@ def generate_journal_pie_plot():
         plt.setp(autotexts, size=10, weight="bold")
     
     # Build a title from 1 to 5 random words from corpus.
-    num_title_words = random.randint(1, 5)
-    title_words = random.sample(corpus_words, min(num_title_words, len(corpus_words)))
+    num_title_words = rng.randint(1, 5)
+    title_words = rng.sample(corpus_words(), min(num_title_words, len(corpus_words())))
     title_text = " ".join(title_words)
     ax.set_title(f"{title_text}: Pie Chart", pad=12, fontweight='bold')
     
     plt.tight_layout()
     return fig
 
-def generate_graphs(num_graphs, sizes):
+def render_graphs(num_graphs, sizes, debug_dir=None, rng=random, mode="RGB"):
+    """Renders graphs in memory with proper resizing and conversion to `mode` ("RGB" or "L"), drawing from `rng`"""
     global graph_counter
-    """Main graph generation function with proper resizing and mode conversion"""
     graph_functions = {
         #'scatter': generate_journal_scatter_plot,
         'line': generate_journal_line_plot,
@@ -630,29 +625,41 @@ def generate_graphs(num_graphs, sizes):
         #'pie': generate_journal_pie_plot
     }
     
-    os.makedirs("Generation/graph", exist_ok=True)
-    image_paths = []
+    elements = []
     
     for i in range(num_graphs):
         # Select graph type and generate
-        gtype = random.choice(list(graph_functions.keys()))
-        fig = graph_functions[gtype]()
+        gtype = rng.choice(list(graph_functions.keys()))
+        fig = graph_functions[gtype](rng)
         
-        # Save high-quality version with white background
-        temp_path = f"Generation/graph/temp_{graph_counter}.png"
-        fig.savefig(temp_path, dpi=600, bbox_inches='tight', facecolor='white')
+        # Render high-quality version with white background into memory
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=600, bbox_inches='tight', facecolor='white',
+                    pil_kwargs={'compress_level': 0})  # Skip zlib, the buffer is decoded right away
         plt.close(fig)
+        buffer.seek(0)
         
-        # Resize and convert to RGB
+        # Resize and convert to the page mode
         target_size = sizes[i % len(sizes)]
-        img = Image.open(temp_path).convert('RGB')  # Convert to RGB mode
+        img = Image.open(buffer).convert(mode)  # Convert to RGB or L mode
         img = img.resize(target_size, Image.LANCZOS)
         
-        # Save final version
-        final_path = f"Generation/graph/{gtype}_{graph_counter}.jpg"
+        if debug_dir:
+            os.makedirs(debug_dir, exist_ok=True)
+            img.save(os.path.join(debug_dir, f"{gtype}_{graph_counter}.jpg"), quality=95)
+        elements.append({"image": img, "graph_type": gtype, "index": graph_counter})
         graph_counter+=1
-        img.save(final_path, quality=95)
+
+    return elements
+
+def generate_graphs(num_graphs, sizes, rng=random):
+    """Same as render_graphs but saves every graph under Generation/graph and returns the paths"""
+    os.makedirs("Generation/graph", exist_ok=True)
+    image_paths = []
+
+    for elem in render_graphs(num_graphs, sizes, rng=rng):
+        final_path = f"Generation/graph/{elem['graph_type']}_{elem['index']}.jpg"
+        elem["image"].save(final_path, quality=95)
         image_paths.append(final_path)
-        os.remove(temp_path)
-    
-    return image_paths
\ No newline at end of file
+
+    return image_paths
@@ -0,0 +1,142 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from PIL import Image
+from asset_store import StoreWriter, shared_store, store_version
+from image_catalog import folder_catalog
+
+# Decoded source images kept at power-of-two pyramid levels.
+# Level k of a source is the image reduced by 2**k, decoded straight at (about) that scale with
+# JPEG draft mode and brought to size with Image.reduce, so a few hundred pixel figure never
+# decodes or resamples the full source. A placement resizes with LANCZOS from the smallest
+# level still REDUCING_GAP times as large as the target, like Pillow's own reducing_gap, which
+# keeps the result indistinguishable from resampling the full source. Levels only depend on the file, so a page is
+# the same whatever the worker's cache holds.
+# With several workers the parent can decode the levels once into a shared asset store per folder
+# (asset_store.py), workers then map levels from it instead of decoding and caching their own.
+# A store only holds the levels that figures of the configured sizes can pick, and is kept next
+# to its folder like the image catalog, reused by later runs while the folder is unchanged.
+
+# Memory cap of the decoded levels, least recently used levels are evicted beyond it
+MAX_BYTES = 256 * 1024 * 1024
+# Smallest level kept, the source reduced by 2**MAX_LEVEL
+MAX_LEVEL = 3
+# How many times larger than the target the level resampled from has to be
+REDUCING_GAP = 2
+
+def pick_level(width, height, target):
+    """Deepest level whose size (ceil of the source size over 2**k) still covers REDUCING_GAP times the target."""
+    level = 0
+    while (level < MAX_LEVEL and -(-width // 2 ** (level + 1)) >= REDUCING_GAP * target[0]
+           and -(-height // 2 ** (level + 1)) >= REDUCING_GAP * target[1]):
+        level += 1
+    return level
+
+def level_name(path, mode, level):
+    """Name of a level in the asset store."""
+    return f"{mode}:{level}:{path}"
+
+class ImagePyramidCache:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.levels = OrderedDict()
+        # Prefetch threads (prefetch.py) share the cache, a level may be decoded twice but never lost
+        self.lock = threading.Lock()
+
+    def _decode(self, path, mode, level):
+        factor = 2 ** level
+        with Image.open(path) as img:
+            width = img.width
+            if level and img.format == "JPEG":
+                # DCT scaling, the decoder picks the largest reduction of at most `factor`
+                img.draft(mode, (-(-img.width // factor), -(-img.height // factor)))
+            decoded = img.convert(mode)
+        # Reduce the rest of the way, ceil(width / factor) like the decoder's own scaling
+        remaining = factor // round(width / decoded.width)
+        if remaining > 1:
+            decoded = decoded.reduce(remaining)
+        return decoded
+
+    def level(self, path, mode, level):
+        """Level `level` of a source in `mode` ("RGB" or "L"), decoded on a miss."""
+        store = shared_store(level_name(path, mode, level))
+        if store is not None:
+            # Mapped from the store, "RGB" maps as RGBX which resizes the same
+            return store.image(level_name(path, mode, level), mode)
+        key = (path, mode, level)
+        with self.lock:
+            img = self.levels.get(key)
+            if img is not None:
+                self.levels.move_to_end(key)
+                return img
+        img = self._decode(path, mode, level)
+        with self.lock:
+            if key in self.levels:
+                return self.levels[key]
+            self.levels[key] = img
+            self.bytes += img.width * img.height * len(img.getbands())
+            while self.bytes > self.max_bytes and len(self.levels) > 1:
+                _, evicted = self.levels.popitem(last=False)
+                self.bytes -= evicted.width * evicted.height * len(evicted.getbands())
+        return img
+
+    def resized(self, source, size, mode="RGB"):
+        """
+        A source image resized to `size`.
+
+        :param source: Catalog entry with the "path", "width" and "height" of the source.
+        """
+        level = pick_level(source["width"], source["height"], size)
+        resized = self.level(source["path"], mode, level).resize(size, Image.LANCZOS)
+        return resized if resized.mode == mode else resized.convert(mode)
+
+# One cache per worker process
+_cache = None
+
+def image_cache():
+    global _cache
+    if _cache is None:
+        _cache = ImagePyramidCache()
+    return _cache
+
+def level_store_file(folder, mode):
+    return f"{os.path.normpath(folder)}.{mode}.levels"
+
+def store_levels(width, height, sizes):
+    """
+    Levels pick_level can return for a width x height source and targets within `sizes`.
+
+    :param sizes: ((min width, min height), (max width, max height)) of the targets.
+    """
+    smallest, largest = sizes
+    return range(pick_level(width, height, largest), pick_level(width, height, smallest) + 1)
+
+def write_level_store(folder, mode, sizes):
+    """
+    Decodes the pyramid levels of the images of `folder` that targets within `sizes` can use into
+    an asset store for the workers. An existing store of the same version is reused as it is.
+
+    :param folder: Source image folder, as it is passed to the image catalog.
+    :param sizes: ((min width, min height), (max width, max height)) of the resized images.
+    :returns: Path of the store, None if the folder cannot be read (workers then decode the images themselves).
+    """
+    path = level_store_file(folder, mode)
+    try:
+        catalog = folder_catalog(folder)
+    except OSError as e:
+        print(f"No shared store for {folder}: {e}")
+        return None
+    # Same JSON round trip as the stored version, so tuples compare equal to lists
+    version = json.loads(json.dumps({"catalog": catalog.mtime, "sizes": sizes, "max_level": MAX_LEVEL,
+                                     "reducing_gap": REDUCING_GAP}))
+    if store_version(path) == version:
+        return path
+    print(f"Decoding the source images of {folder} into {path}...")
+    cache = ImagePyramidCache()
+    with StoreWriter(path, version) as writer:
+        for source, width, height, _ in catalog.entries:
+            for level in store_levels(width, height, sizes):
+                writer.add_image(level_name(source, mode, level), cache._decode(source, mode, level))
+    return path
@@ -0,0 +1,86 @@
+import os
+import json
+from functools import lru_cache
+from PIL import Image
+from checkpoint import atomic_write_json
+
+# Catalog of the source images of a folder.
+# A folder is listed once and every image's size and mode are read from its header, then the
+# catalog is kept next to the folder as <folder>.catalog.json, outside it so that writing the
+# catalog does not change the folder. It is reused as long as the folder's mtime is unchanged
+# (adding, removing or renaming files changes it); a stale catalog is rebuilt, reading only the
+# headers of files it does not know yet. Each process loads a catalog once, so placing a figure
+# picks an entry by index and never touches the directory.
+
+IMAGE_EXTENSIONS = ('.jpg', '.png', '.jpeg')
+
+def catalog_file(folder):
+    return os.path.normpath(folder) + ".catalog.json"
+
+class FolderCatalog:
+    def __init__(self, folder):
+        """
+        :param folder: Folder of source images.
+        """
+        self.folder = folder
+        # Version of the catalog, the folder's mtime when it was listed
+        self.mtime = os.path.getmtime(folder)
+        self.entries = self._load()
+
+    def _load(self):
+        """Sorted (path, width, height, mode) of the images, from the cached catalog if it is current."""
+        catalog_path = catalog_file(self.folder)
+        mtime = self.mtime
+        known = {}
+        try:
+            with open(catalog_path, "r") as f:
+                cached = json.load(f)
+            if cached["mtime"] == mtime:
+                return [(os.path.join(self.folder, name), w, h, mode) for name, w, h, mode in cached["images"]]
+            known = {name: (w, h, mode) for name, w, h, mode in cached["images"]}
+        except (OSError, ValueError, KeyError):
+            pass
+
+        images = []
+        # Sorted so that a seeded rng picks the same files on every machine
+        for name in sorted(f for f in os.listdir(self.folder) if f.lower().endswith(IMAGE_EXTENSIONS)):
+            info = known.get(name)
+            if info is None:
+                try:
+                    with Image.open(os.path.join(self.folder, name)) as img:
+                        info = (img.width, img.height, img.mode)
+                except OSError as e:
+                    print(f"Skipping unreadable image {name}: {e}")
+                    continue
+            images.append([name, *info])
+        try:
+            atomic_write_json(catalog_path, {"mtime": mtime, "images": images})
+        except OSError as e:
+            print(f"Image catalog of {self.folder} not saved: {e}")
+        return [(os.path.join(self.folder, name), w, h, mode) for name, w, h, mode in images]
+
+@lru_cache(maxsize=None)
+def folder_catalog(folder):
+    """The FolderCatalog of a folder, loaded once per process."""
+    return FolderCatalog(folder)
+
+class ImageCatalog:
+    def __init__(self, science_folder, non_science_folder):
+        self.classes = {"science": folder_catalog(science_folder), "non_science": folder_catalog(non_science_folder)}
+        if not self.classes["science"].entries:
+            raise ValueError("No science images found in the specified folder.")
+        if not self.classes["non_science"].entries:
+            raise ValueError("No non-science images found in the specified folder.")
+
+    def sample(self, rng, split):
+        """
+        Picks a source image, science with probability `split`.
+
+        :returns: Dict with the "path", "class", "width", "height" and "mode" of the image.
+        """
+        kind = "science" if rng.random() < split else "non_science"
+        path, width, height, mode = rng.choice(self.classes[kind].entries)
+        return {"path": path, "class": kind, "width": width, "height": height, "mode": mode}
+
+def image_catalog(science_folder, non_science_folder):
+    return ImageCatalog(science_folder, non_science_folder)
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+from collections import defaultdict
+from engine import run_pages
+
+# Layout-only runs: place elements with the real placement logic, skip all rendering,
+# and report the resulting boxes as COCO, YOLO labels and per-class statistics.
+
+# COCO [x_min, y_min, w, h] to a YOLO label line (normalized center and size)
+def yolo_line(category_id, bbox, img_w, img_h):
+    x_min, y_min, box_w, box_h = bbox
+    x_center = (x_min + box_w / 2) / img_w
+    y_center = (y_min + box_h / 2) / img_h
+    return f"{category_id} {x_center:.6f} {y_center:.6f} {box_w / img_w:.6f} {box_h / img_h:.6f}"
+
+def write_yolo_labels(coco_data, label_dir):
+    os.makedirs(label_dir, exist_ok=True)
+    lines = defaultdict(list)
+    images = {img["id"]: img for img in coco_data["images"]}
+    for ann in coco_data["annotations"]:
+        img = images[ann["image_id"]]
+        lines[ann["image_id"]].append(yolo_line(ann["category_id"], ann["bbox"], img["width"], img["height"]))
+    for image_id, img in images.items():
+        label_name = os.path.splitext(img["file_name"])[0] + ".txt"
+        with open(os.path.join(label_dir, label_name), "w") as f:
+            f.write("\n".join(lines[image_id]))
+
+def layout_stats(coco_data):
+    """
+    Per-class box statistics of a COCO dict.
+
+    :returns: Dict keyed by category name with count, boxes per page, mean/min/max width and height
+              and the mean fraction of the page area covered by the class.
+    """
+    names = {c["id"]: c["name"] for c in coco_data["categories"]}
+    images = {img["id"]: img for img in coco_data["images"]}
+    num_pages = max(1, len(images))
+    per_class = defaultdict(list)
+    for ann in coco_data["annotations"]:
+        per_class[ann["category_id"]].append(ann)
+
+    stats = {}
+    for category_id, anns in sorted(per_class.items()):
+        widths = [a["bbox"][2] for a in anns]
+        heights = [a["bbox"][3] for a in anns]
+        coverage = sum(a["bbox"][2] * a["bbox"][3] / (images[a["image_id"]]["width"] * images[a["image_id"]]["height"])
+                       for a in anns)
+        stats[names.get(category_id, str(category_id))] = {
+            "count": len(anns),
+            "per_page": len(anns) / num_pages,
+            "mean_width": sum(widths) / len(widths),
+            "mean_height": sum(heights) / len(heights),
+            "min_height": min(heights),
+            "max_height": max(heights),
+            "page_coverage": coverage / num_pages
+        }
+    return stats
+
+def report_layouts(layout_fn, page_ids, coco_template, out_dir, workers=1, seed=0):
+    """
+    Runs a layout-only page function over page_ids, then writes annotations.json, YOLO labels
+    and stats.json to out_dir and prints the per-class statistics.
+
+    :param layout_fn: Page function taking (page_id, rng) that returns a record without rendering.
+    :returns: The statistics dict.
+    """
+    start = time.time()
+    coco_path = run_pages(layout_fn, page_ids, coco_template, out_dir, workers, seed, verbose=False)
+    elapsed = time.time() - start
+
+    with open(coco_path, "r") as f:
+        coco_data = json.load(f)
+    write_yolo_labels(coco_data, os.path.join(out_dir, "labels"))
+    stats = layout_stats(coco_data)
+    with open(os.path.join(out_dir, "stats.json"), "w") as f:
+        json.dump(stats, f, indent=4)
+
+    num_pages = len(coco_data["images"])
+    print(f"{num_pages} layouts in {elapsed:.2f}s ({num_pages / max(elapsed, 1e-9):.0f} layouts/s)")
+    for name, s in stats.items():
+        print(f"{name:>8}: {s['count']} boxes, {s['per_page']:.2f}/page, "
+              f"mean {s['mean_width']:.0f}x{s['mean_height']:.0f}, "
+              f"height {s['min_height']}-{s['max_height']}, covers {100 * s['page_coverage']:.1f}% of a page")
+    return stats
@@ -0,0 +1,112 @@
+import random
+
+# Constructive placement of a set of element sizes on a page (MaxRects bin packing).
+# The packer keeps the maximal free rectangles of the page. Each element goes into the free
+# rectangle the heuristic scores best, at a random corner of it, and the free rectangles are
+# split around it. Every element is placed or rejected in one pass, so elements can be
+# rendered after their slot is known and no render is thrown away.
+
+# Scores of a free rectangle (x, y, w, h) for an element of size (w, h), lower is better
+HEURISTICS = {
+    "best_short_side": lambda free, w, h: min(free[2] - w, free[3] - h),
+    "best_long_side": lambda free, w, h: max(free[2] - w, free[3] - h),
+    "best_area": lambda free, w, h: free[2] * free[3] - w * h,
+    "top_left": lambda free, w, h: (free[1], free[0])
+}
+
+def _intersects(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+def _contains(a, b):
+    """True if rectangle a contains rectangle b."""
+    return a[0] <= b[0] and a[1] <= b[1] and b[0] + b[2] <= a[0] + a[2] and b[1] + b[3] <= a[1] + a[3]
+
+class MaxRectsPacker:
+    def __init__(self, width, height, x=0, y=0):
+        """
+        :param width: Width of the area to pack.
+        :param height: Height of the area to pack.
+        :param x: Left edge of the area on the page.
+        :param y: Top edge of the area on the page.
+        """
+        self.free = [(x, y, width, height)]
+        self.used = []
+
+    def insert(self, w, h, rng=random, heuristic="best_short_side"):
+        """
+        Places a w x h rectangle.
+
+        :param rng: Random stream breaking ties between free rectangles and picking the corner.
+        :param heuristic: Key of HEURISTICS choosing the free rectangle.
+        :returns: (x, y) of the rectangle or None if it fits nowhere.
+        """
+        score = HEURISTICS[heuristic]
+        best, best_score = [], None
+        for free in self.free:
+            if w <= free[2] and h <= free[3]:
+                s = score(free, w, h)
+                if best_score is None or s < best_score:
+                    best, best_score = [free], s
+                elif s == best_score:
+                    best.append(free)
+        if not best:
+            return None
+
+        fx, fy, fw, fh = rng.choice(best)
+        if heuristic == "top_left":
+            x, y = fx, fy
+        else:
+            x = fx if rng.random() < 0.5 else fx + fw - w
+            y = fy if rng.random() < 0.5 else fy + fh - h
+        rect = (x, y, w, h)
+        self._split(rect)
+        self.used.append(rect)
+        return x, y
+
+    # Replaces every free rectangle the new one overlaps by the maximal pieces around it
+    def _split(self, rect):
+        x, y, w, h = rect
+        pieces = []
+        for free in self.free:
+            if not _intersects(free, rect):
+                pieces.append(free)
+                continue
+            fx, fy, fw, fh = free
+            if x > fx:
+                pieces.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                pieces.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                pieces.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                pieces.append((fx, y + h, fw, fy + fh - y - h))
+
+        # Drop pieces contained in another one
+        pieces = list(dict.fromkeys(pieces))
+        self.free = [a for i, a in enumerate(pieces)
+                     if not any(j != i and _contains(b, a) for j, b in enumerate(pieces))]
+
+def pack(sizes, width, height, rng=random, x=0, y=0, gap=0, heuristic=None):
+    """
+    Packs element sizes into a page area in one pass, largest first.
+
+    :param sizes: List of (width, height).
+    :param width: Width of the area.
+    :param height: Height of the area.
+    :param rng: Random stream of the placement.
+    :param x: Left edge of the area on the page.
+    :param y: Top edge of the area on the page.
+    :param gap: Minimum distance between elements.
+    :param heuristic: Key of HEURISTICS, drawn from rng per call if None.
+    :returns: List of (x, y) in the order of sizes, None for an element that did not fit.
+    """
+    if heuristic is None:
+        heuristic = rng.choice(sorted(HEURISTICS))
+    # Elements are padded by the gap, so the area is as well to keep the last gap off the edge
+    packer = MaxRectsPacker(width + gap, height + gap, x, y)
+    positions = [None] * len(sizes)
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][0] * sizes[i][1])
+    for i in order:
+        w, h = sizes[i]
+        positions[i] = packer.insert(w + gap, h + gap, rng, heuristic)
+    return positions
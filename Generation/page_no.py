@@ -1,14 +1,12 @@
 import os
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+from fonts import get_font
 
 def generate_page_number_image(page_number, font_size=30, font_path="arial.ttf", text_color="black", bg_color="white", output_dir="Generation/page"):
 
     text = f"Page No {page_number}"
 
-    try:
-        font = ImageFont.truetype(font_path, font_size)
-    except IOError:
-        font = ImageFont.load_default()  # Fallback if font is missing
+    font = get_font(font_path, font_size)  # Falls back to an installed face if the font is missing
 
     # Determine text size using textbbox (new in Pillow 10)
     dummy_img = Image.new("RGB", (1, 1))
@@ -32,6 +30,7 @@ def generate_page_number_image(page_number, font_size=30, font_path="arial.ttf",
 
     return image_path
 
-# Example usage
-page_image_path = generate_page_number_image(1)
-print(f"Page number image saved at: {page_image_path}")
+if __name__ == "__main__":
+    # Example usage
+    page_image_path = generate_page_number_image(1)
+    print(f"Page number image saved at: {page_image_path}")
@@ -0,0 +1,38 @@
+import random
+import numpy as np
+
+# Key of the numpy stream inside a page's seed sequence, far away from the small child keys
+NUMPY_STREAM = 2**32 - 1
+
+class PageRandom(random.Random):
+    """
+    Counter-based random stream of one page.
+
+    It is derived from (run_seed, page_id) only, so any page can be regenerated on its own
+    and a run gives the same pages whether it is serial or split across workers.
+    It is a drop-in replacement for the `random` module and carries a numpy Generator
+    from the same seed sequence in `.np`.
+    """
+
+    def __init__(self, run_seed, key):
+        self.run_seed = run_seed
+        self.key = tuple(key)
+        seed_seq = np.random.SeedSequence(run_seed, spawn_key=self.key)
+        super().__init__(int.from_bytes(seed_seq.generate_state(4).tobytes(), "little"))
+        self.np = np.random.default_rng(np.random.SeedSequence(run_seed, spawn_key=self.key + (NUMPY_STREAM,)))
+
+    def spawn(self, *key):
+        """Returns an independent child stream, e.g. one per element of the page."""
+        return PageRandom(self.run_seed, self.key + key)
+
+def page_rng(run_seed, page_id):
+    """Returns the random stream of page `page_id` in run `run_seed`."""
+    return PageRandom(run_seed, (page_id,))
+
+def child_rng(rng, *key):
+    """Child stream of `rng`, or `rng` itself for the `random` module which cannot spawn."""
+    return rng.spawn(*key) if isinstance(rng, PageRandom) else rng
+
+def numpy_generator(rng):
+    """Numpy counterpart of `rng`, falls back to the global numpy state for the `random` module."""
+    return getattr(rng, "np", np.random)
@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from image_cache import image_cache
+
+# Background decoding and resizing of the source images a page is about to place.
+# Once a page is planned its image figures, their sizes and (replaying their random streams)
+# their sources are known, so they are handed to a few threads which decode and resize them
+# while the page renders its graphs and text. Pillow releases the GIL while decoding and
+# resampling, so the threads run alongside the composer. A figure picks its resized image up
+# from here, or resizes it itself when it was not prefetched; both give the same pixels.
+
+# Threads decoding and resizing per worker process
+THREADS = 2
+# Prefetched images kept waiting at most, the oldest are dropped beyond it
+DEPTH = 8
+
+class ImagePrefetcher:
+    def __init__(self, threads=THREADS, depth=DEPTH):
+        self.depth = depth
+        self.pool = None
+        self.threads = threads
+        self.pending = OrderedDict()
+        self.lock = threading.Lock()
+
+    def prefetch(self, source, size, mode="RGB"):
+        """Starts resizing a catalog source to `size` in the background."""
+        key = (source["path"], tuple(size), mode)
+        with self.lock:
+            if key in self.pending:
+                return
+            if self.pool is None:
+                # Started on first use, so that forked worker processes each get their own threads
+                self.pool = ThreadPoolExecutor(self.threads, thread_name_prefix="prefetch")
+            self.pending[key] = self.pool.submit(image_cache().resized, source, tuple(size), mode)
+            while len(self.pending) > self.depth:
+                _, dropped = self.pending.popitem(last=False)
+                dropped.cancel()
+
+    def resized(self, source, size, mode="RGB"):
+        """A source resized to `size`, the prefetched image if there is one."""
+        with self.lock:
+            future = self.pending.pop((source["path"], tuple(size), mode), None)
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception as e:
+                print(f"Prefetching {source['path']} failed, resizing it again: {e}")
+        return image_cache().resized(source, size, mode)
+
+# One prefetcher per worker process
+_prefetcher = None
+
+def prefetcher():
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = ImagePrefetcher()
+    return _prefetcher
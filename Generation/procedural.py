@@ -0,0 +1,129 @@
+import numpy as np
+from functools import lru_cache
+from matplotlib import colormaps
+from PIL import Image
+from page_random import numpy_generator
+
+# Procedural figure source.
+# Figure-like content drawn in numpy from the element's random stream: fluorescence microscopy
+# style noise fields, smooth gradients, blob and shape diagrams and heatmaps. Every kind is a few
+# whole-array operations at the target size, so a figure costs no disk read or decode and there
+# is no end to the variety. A "procedural_split" share of the image figures (config.json5) is
+# drawn here instead of from the science and non-science folders.
+
+KINDS = ("microscopy", "gradient", "shapes", "heatmap")
+# Colormaps of gradients and heatmaps
+COLORMAPS = ("viridis", "plasma", "inferno", "magma", "cividis", "coolwarm", "RdBu_r", "YlGnBu", "Greys")
+# Stain colors of microscopy channels
+STAINS = np.array([[0.1, 1.0, 0.2], [1.0, 0.15, 0.8], [1.0, 0.2, 0.1], [0.2, 0.4, 1.0], [1.0, 0.9, 0.2]])
+
+@lru_cache(maxsize=None)
+def colormap_lut(name):
+    """(256, 3) uint8 lookup table of a matplotlib colormap."""
+    return (colormaps[name](np.linspace(0, 1, 256))[:, :3] * 255).round().astype(np.uint8)
+
+def _generator(rng):
+    # The `random` module only has the global numpy state, which lacks the Generator methods
+    g = numpy_generator(rng)
+    return g if hasattr(g, "integers") else np.random.default_rng(g.randint(2**31))
+
+def _normalize(a):
+    lo, hi = a.min(), a.max()
+    return (a - lo) / (hi - lo) if hi > lo else np.zeros_like(a)
+
+def _blur(a, sigma):
+    """Gaussian blur of a 2D array with the FFT, wrapping at the edges."""
+    fy = np.fft.fftfreq(a.shape[0])[:, None]
+    fx = np.fft.rfftfreq(a.shape[1])[None, :]
+    spectrum = np.fft.rfft2(a) * np.exp(-2 * (np.pi * sigma) ** 2 * (fx ** 2 + fy ** 2))
+    return np.fft.irfft2(spectrum, s=a.shape)
+
+def _smooth_noise(g, height, width, sigma):
+    """White noise blurred to features about `sigma` pixels wide, in [0, 1]."""
+    return _normalize(_blur(g.standard_normal((height, width)), sigma))
+
+def _to_uint8(a):
+    return (np.clip(a, 0, 1) * 255).astype(np.uint8)
+
+def microscopy(g, width, height):
+    """Stained cells and nuclei on a dark, grainy background."""
+    radius = g.uniform(0.02, 0.06) * min(width, height)
+    count = int(g.integers(5, 40))
+    spikes = np.zeros((height, width))
+    spikes[g.integers(0, height, count), g.integers(0, width, count)] = g.uniform(0.5, 1.0, count)
+    # Point cells blurred into round ones (a blurred point peaks at 1 / (2 pi sigma^2)),
+    # with a textured, uneven staining
+    cells = 2 * np.pi * radius ** 2 * _blur(spikes, radius) * (0.6 + 0.4 * _smooth_noise(g, height, width, radius / 4))
+    nuclei = (2 * np.pi * (radius / 2.5) ** 2 * _blur(spikes, radius / 2.5)) ** 2
+    background = 0.08 * _smooth_noise(g, height, width, min(width, height) / 6)
+    stains = STAINS[g.choice(len(STAINS), 2, replace=False)]
+    rgb = (cells + background)[..., None] * stains[0] + nuclei[..., None] * stains[1]
+    return _to_uint8(rgb + g.normal(0, 0.03, rgb.shape))
+
+def gradient(g, width, height):
+    """Linear or radial color gradient with a slight smooth texture."""
+    y, x = np.mgrid[0:1:height * 1j, 0:1:width * 1j]
+    if g.random() < 0.5:
+        angle = g.uniform(0, 2 * np.pi)
+        t = _normalize(x * np.cos(angle) + y * np.sin(angle))
+    else:
+        cx, cy = g.uniform(0, 1, 2)
+        t = _normalize(np.hypot(x - cx, y - cy))
+    t = t + 0.1 * (_smooth_noise(g, height, width, min(width, height) / 10) - 0.5)
+    return colormap_lut(g.choice(COLORMAPS))[_to_uint8(t)]
+
+def shapes(g, width, height):
+    """Diagram of filled blobs, circles and rectangles with dark outlines on white."""
+    rgb = np.ones((height, width, 3))
+    y, x = np.ogrid[0:height, 0:width]
+    size = min(width, height)
+    # Blobs are level sets of smooth noise
+    field = _smooth_noise(g, height, width, size / 8)
+    level = g.uniform(0.6, 0.75)
+    rgb[field > level] = g.uniform(0.3, 0.95, 3)
+    rgb[(field > level - 0.02) & (field <= level)] = 0.2
+    for _ in range(int(g.integers(2, 10))):
+        cx, cy = g.uniform(0, width), g.uniform(0, height)
+        r = g.uniform(0.05, 0.2) * size
+        line = max(1.0, size / 150)
+        if g.random() < 0.5:
+            distance = np.hypot(x - cx, y - cy) - r
+        else:
+            aspect = g.uniform(0.5, 2)
+            distance = np.maximum(np.abs(x - cx) - r * aspect, np.abs(y - cy) - r)
+        rgb[distance <= 0] = g.uniform(0.3, 0.95, 3)
+        rgb[np.abs(distance) <= line / 2] = 0.15
+    return _to_uint8(rgb)
+
+def heatmap(g, width, height):
+    """Matrix of correlated values as colored cells separated by thin white lines."""
+    rows, cols = int(g.integers(4, 25)), int(g.integers(4, 25))
+    # Low rank structure plus noise, like a correlation or confusion matrix
+    rank = int(g.integers(1, 4))
+    matrix = _normalize(g.standard_normal((rows, rank)) @ g.standard_normal((rank, cols))
+                        + 0.5 * g.standard_normal((rows, cols)))
+    ys = np.arange(height) * rows // height
+    xs = np.arange(width) * cols // width
+    rgb = colormap_lut(g.choice(COLORMAPS))[_to_uint8(matrix[ys][:, xs])]
+    rgb[np.flatnonzero(np.diff(ys)) + 1] = 255
+    rgb[:, np.flatnonzero(np.diff(xs)) + 1] = 255
+    return rgb
+
+_KIND_FUNCTIONS = {"microscopy": microscopy, "gradient": gradient, "shapes": shapes, "heatmap": heatmap}
+
+def procedural_source(rng):
+    """Picks a procedural kind, in the shape of an image catalog entry."""
+    kind = rng.choice(KINDS)
+    return {"path": f"procedural:{kind}", "class": "procedural", "kind": kind}
+
+def render_procedural(kind, size, rng, mode="RGB"):
+    """
+    A procedural figure of `kind`.
+
+    :param size: (width, height) of the figure.
+    :param rng: Random stream of the element, the figure draws from its numpy counterpart.
+    :param mode: PIL mode of the figure, "RGB" or "L".
+    """
+    width, height = size
+    img = Image.fromarray(_KIND_FUNCTIONS[kind](_generator(rng), width, height), "RGB")
+    return img if mode == "RGB" else img.convert(mode)
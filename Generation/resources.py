@@ -0,0 +1,89 @@
+import os
+import sys
+from functools import lru_cache
+import numpy as np
+import json5
+
+# Configs and corpora, loaded on first use and cached per process.
+# Paths are resolved next to this file, so the generators work from any working directory
+# and importing a module (or starting a worker) parses nothing until a value is needed.
+
+GENERATION_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Used when the corpus is missing or empty
+FALLBACK_WORDS = ("Time", "Measurement", "Experiment", "Data", "Result")
+
+def resource_path(name):
+    return os.path.join(GENERATION_DIR, name)
+
+@lru_cache(maxsize=None)
+def load_config(name="config.json5"):
+    """Parses a json5 config of this folder once per process. The dict is shared, do not modify it."""
+    with open(resource_path(name), "r") as f:
+        return json5.load(f)  # json5 allows comments
+
+class Corpus:
+    """
+    A word corpus stored once per process: an interned vocabulary of the distinct words and
+    a numpy array of word ids, one per corpus line, so duplicate lines keep their weight.
+    Text is sampled as ids in bulk from a numpy Generator and joined from the vocabulary.
+    Word widths are kept per font as arrays over the vocabulary, measured on first use.
+    """
+
+    def __init__(self, lines):
+        ids = {}
+        self.vocabulary = []
+        token_ids = []
+        for line in lines:
+            word = sys.intern(line)
+            if word not in ids:
+                ids[word] = len(self.vocabulary)
+                self.vocabulary.append(word)
+            token_ids.append(ids[word])
+        self.token_ids = np.array(token_ids, dtype=np.int32)
+        self.tokens = tuple(self.vocabulary[i] for i in token_ids)
+        self._widths = {}
+
+    def sample_ids(self, count, g):
+        """
+        Samples `count` word ids uniformly over the corpus lines.
+
+        :param g: numpy Generator, or the np.random module for callers without a page stream.
+        """
+        draw = g.integers if hasattr(g, "integers") else g.randint
+        return self.token_ids[draw(0, len(self.token_ids), count)]
+
+    def words(self, ids):
+        return [self.vocabulary[i] for i in ids.tolist()]
+
+    def join(self, ids):
+        return " ".join(self.words(ids))
+
+    def widths(self, font, ids, measure):
+        """
+        Widths of the words `ids` in `font`, measuring each vocabulary word once per font.
+
+        :param measure: Function taking (font, word) and returning its width in pixels.
+        :returns: int32 array aligned with ids.
+        """
+        table = self._widths.get(font)
+        if table is None:
+            table = self._widths[font] = np.full(len(self.vocabulary), -1, dtype=np.int32)
+        missing = np.unique(ids[table[ids] < 0])
+        for i in missing.tolist():
+            table[i] = measure(font, self.vocabulary[i])
+        return table[ids]
+
+@lru_cache(maxsize=None)
+def get_corpus(name="corpus.txt"):
+    """The Corpus of a word list of this folder, read once per process, FALLBACK_WORDS if it is missing or empty."""
+    try:
+        with open(resource_path(name), "r") as f:
+            lines = [line.strip() for line in f if line.strip()]
+    except OSError:
+        lines = []
+    return Corpus(lines or FALLBACK_WORDS)
+
+def corpus_words(name="corpus.txt"):
+    """Non-empty lines of a corpus of this folder as a tuple, shared with its Corpus."""
+    return get_corpus(name).tokens
@@ -0,0 +1,76 @@
+import numpy as np
+
+# Occupancy grid for placing elements on a page without overlap.
+# The page is cut into cells of `cell` pixels; a placed box marks every cell it touches.
+# A summed-area table over the grid answers "is this box free" in O(1), and the same table
+# scores every candidate x along a row at once, so a "shift right until it fits" search is one
+# vectorized pass instead of a pixel-by-pixel loop. Two boxes accepted by the grid never overlap.
+
+class OccupancyGrid:
+    def __init__(self, width, height, cell=10):
+        """
+        :param width: Page width in pixels.
+        :param height: Page height in pixels.
+        :param cell: Cell size in pixels, smaller cells waste less space around boxes.
+        """
+        self.width = width
+        self.height = height
+        self.cell = cell
+        self.grid = np.zeros((-(-height // cell), -(-width // cell)), dtype=np.int32)
+        self._sat = None
+
+    # Cell range [c0, c1) x [r0, r1) touched by a pixel box
+    def _cells(self, bbox):
+        x, y, w, h = bbox
+        c = self.cell
+        return max(0, x // c), max(0, y // c), -(-(x + w) // c), -(-(y + h) // c)
+
+    # Summed-area table with a zero first row and column, rebuilt lazily after a box is added
+    def _table(self):
+        if self._sat is None:
+            rows, cols = self.grid.shape
+            self._sat = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+            np.cumsum(np.cumsum(self.grid, axis=0), axis=1, out=self._sat[1:, 1:])
+        return self._sat
+
+    def occupy(self, bbox):
+        """Marks the box (x, y, w, h) as taken."""
+        c0, r0, c1, r1 = self._cells(bbox)
+        self.grid[r0:r1, c0:c1] = 1
+        self._sat = None
+
+    def is_free(self, bbox):
+        """True if the box (x, y, w, h) lies on the page and touches no taken cell."""
+        x, y, w, h = bbox
+        if x < 0 or y < 0 or x + w > self.width or y + h > self.height:
+            return False
+        c0, r0, c1, r1 = self._cells(bbox)
+        s = self._table()
+        return s[r1, c1] - s[r0, c1] - s[r1, c0] + s[r0, c0] == 0
+
+    def next_free_x(self, x, y, w, h, x_max=None):
+        """
+        Smallest x' >= x such that the box (x', y, w, h) is free and ends before x_max.
+        Answers the "shift right until it fits" search in one pass.
+
+        :returns: x' or None if the box fits nowhere on that row.
+        """
+        x_max = self.width if x_max is None else x_max
+        if self.is_free((x, y, w, h)) and x + w <= x_max:
+            return x
+        # Same page bounds as is_free, rows off the page fit nowhere
+        if y < 0 or y + h > self.height:
+            return None
+        c = self.cell
+        c0, r0, _, r1 = self._cells((x, y, w, h))
+        c0 += 1  # The unaligned start was just checked, continue on the grid
+        kw = -(-w // c)
+        c1 = (min(x_max, self.width) - w) // c
+        if c1 < c0:
+            return None
+        s = self._table()
+        cols = np.arange(c0, c1 + 1)
+        ce = np.minimum(cols + kw, self.grid.shape[1])
+        taken = s[r1, ce] - s[r0, ce] - s[r1, cols] + s[r0, cols]
+        free = np.flatnonzero(taken == 0)
+        return int((free[0] + c0) * c) if len(free) else None
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Word-sprite atlas for body text.
+# Every (word, font) is rasterized once into a coverage sprite and blitted into text blocks
+# with numpy afterwards. Blitting uses PIL's own blend for black ink on a grayscale block,
+#   out = DIV255(page * (255 - coverage)),
+# so a block composed from sprites is pixel-identical to one drawn word by word with draw.text.
+# Fonts come from the fonts.get_font cache, so a font object stands for one (file, size, bold).
+
+class WordAtlas:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        :param max_bytes: Memory cap of the sprites, least recently used sprites are evicted beyond it.
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.sprites = OrderedDict()
+
+    @staticmethod
+    def rasterize(font, text):
+        """
+        Coverage of `text` as drawn by draw.text at an integer position.
+
+        :returns: (uint8 coverage array, x offset, y offset) relative to the draw position.
+        """
+        left, top, right, bottom = font.getbbox(text)
+        mask = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+        # Drawing full ink on black gives the coverage itself
+        ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+        return np.asarray(mask), left, top
+
+    def sprite(self, font, word):
+        key = (font, word)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+        sprite = self.rasterize(font, word)
+        self.sprites[key] = sprite
+        self.bytes += sprite[0].nbytes
+        while self.bytes > self.max_bytes and len(self.sprites) > 1:
+            _, evicted = self.sprites.popitem(last=False)
+            self.bytes -= evicted[0].nbytes
+        return sprite
+
+def blit(canvas, sprite, x, y):
+    """Composites a coverage sprite in black onto a grayscale uint8 canvas at draw position (x, y)."""
+    coverage, dx, dy = sprite
+    x0, y0 = x + dx, y + dy
+    h, w = coverage.shape
+    cx0, cy0 = max(x0, 0), max(y0, 0)
+    cx1, cy1 = min(x0 + w, canvas.shape[1]), min(y0 + h, canvas.shape[0])
+    if cx1 <= cx0 or cy1 <= cy0:
+        return
+    region = canvas[cy0:cy1, cx0:cx1]
+    a = coverage[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+    # PIL's BLEND with black ink: DIV255(page * (255 - a)), rounded the same way
+    t = region.astype(np.uint16) * (255 - a).astype(np.uint16) + 128
+    region[...] = (t + (t >> 8)) >> 8
+
+# One atlas per worker process
+_atlas = None
+
+def word_atlas():
+    global _atlas
+    if _atlas is None:
+        _atlas = WordAtlas()
+    return _atlas
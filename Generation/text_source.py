@@ -0,0 +1,159 @@
+import os
+import mmap
+import argparse
+from functools import lru_cache
+import numpy as np
+from resources import load_config, resource_path
+
+# Large text corpora read through memory maps.
+# A UTF-8 text file of any size is mapped read-only next to an index of the byte offsets where
+# its sentences start, a .npy file built once and mapped as well. Text is sampled as a contiguous
+# run of words from a random sentence start, read from the map a chunk at a time, so a worker
+# holds no more than a chunk of the file while the OS shares the pages between all workers.
+
+# Bytes read from the map at a time
+CHUNK_SIZE = 4096
+# Bytes scanned at a time while indexing
+SCAN_SIZE = 64 * 1024 * 1024
+
+def index_path(path):
+    return path + ".sentences.npy"
+
+def _sentence_starts(block, base):
+    """Offsets in the file (block starts at `base`) where a sentence starts inside the block."""
+    data = np.frombuffer(block, dtype=np.uint8)
+    ends = np.isin(data[:-1], np.frombuffer(b".!?", dtype=np.uint8))
+    spaces = np.isin(data[1:], np.frombuffer(b" \t\r\n", dtype=np.uint8))
+    # After a sentence end and its whitespace, and after every line break
+    after_end = np.flatnonzero(ends & spaces) + 2
+    after_line = np.flatnonzero(data[:-1] == ord("\n")) + 1
+    return np.union1d(after_end, after_line).astype(np.int64) + base
+
+def _scan(text_map):
+    """Sentence starts after offset 0, one array per block of the mapped file."""
+    size = len(text_map)
+    for start in range(0, size, SCAN_SIZE):
+        # Read from two bytes before the block, so the delimiters of a sentence starting at
+        # its first or second byte are seen; every start is kept by exactly one block
+        base = max(0, start - 2)
+        block = text_map[base:min(start + SCAN_SIZE, size)]
+        starts = _sentence_starts(block, base)
+        yield starts[(starts > 0) & (starts >= start) & (starts < min(start + SCAN_SIZE, size))]
+
+def build_index(path):
+    """
+    Writes the sentence-offset index of a text file, streaming: two passes over the map,
+    one to count the sentences and one to fill the .npy in place. Each process writes its own
+    temporary file, so processes indexing the same text at once all move a complete index in place.
+
+    :returns: Path of the index.
+    """
+    out = index_path(path)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    if not os.path.getsize(path):
+        raise ValueError(f"{path} is empty, there is no text to sample")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as text_map:
+        count = 1 + sum(len(starts) for starts in _scan(text_map))
+        index = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.int64, shape=(count,))
+        index[0] = 0
+        filled = 1
+        for starts in _scan(text_map):
+            index[filled:filled + len(starts)] = starts
+            filled += len(starts)
+        index.flush()
+        del index
+    os.replace(tmp, out)
+    return out
+
+def index_is_current(path):
+    """True if the index of a text file exists and is not older than the text."""
+    try:
+        return os.path.getmtime(index_path(path)) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+def ensure_index(path):
+    """
+    Builds the index of a text file unless a current one exists, also one another process finished.
+
+    :returns: Path of the index.
+    """
+    if not index_is_current(path):
+        print(f"Indexing sentences of {path}...")
+        build_index(path)
+    return index_path(path)
+
+class TextSource:
+    def __init__(self, path):
+        """
+        :param path: UTF-8 text file, its index is built on first use or when the file is newer.
+        """
+        self.path = path
+        # An empty file cannot be mapped, and would have no word to yield
+        if not os.path.getsize(path):
+            raise ValueError(f"{path} is empty, there is no text to sample")
+        index_file = ensure_index(path)
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = np.load(index_file, mmap_mode="r")
+
+    def _start(self, g):
+        # g is a numpy Generator or the np.random module, like Corpus.sample_ids takes
+        draw = g.integers if hasattr(g, "integers") else g.randint
+        return int(self.index[draw(0, len(self.index))])
+
+    def iter_words(self, g):
+        """
+        Endless words of the text from a random sentence start on, wrapping around at the end.
+        Chunks are read as the words are consumed, so a full text box stops the reading.
+        """
+        offset = self._start(g)
+        rest = b""
+        while True:
+            chunk = self.map[offset:offset + CHUNK_SIZE]
+            offset += len(chunk)
+            if not chunk:
+                offset = 0  # Wrap around
+                chunk, rest = rest + b" ", b""
+            else:
+                chunk, rest = rest + chunk, b""
+                # Keep a word cut by the chunk edge for the next chunk
+                cut = max(chunk.rfind(b" "), chunk.rfind(b"\n"))
+                if cut >= 0:
+                    chunk, rest = chunk[:cut], chunk[cut:]
+                else:
+                    rest, chunk = chunk, b""
+            yield from chunk.decode("utf-8", errors="ignore").split()
+
+    def sample_text(self, count, g):
+        """`count` contiguous words from a random sentence start."""
+        words = self.iter_words(g)
+        return " ".join(next(words) for _ in range(count))
+
+@lru_cache(maxsize=None)
+def get_text_source(path):
+    """The TextSource of a file, opened once per process."""
+    return TextSource(path)
+
+def configured_text_source():
+    """The TextSource of the "text_source" file in config.json5, None to sample corpus.txt words."""
+    path = load_config().get("text_source")
+    return get_text_source(resource_path(path)) if path else None
+
+def prepare_text_source():
+    """
+    Indexes the "text_source" file of config.json5 in the parent before the workers start, so they
+    only map it. Errors are printed here and reported again by the elements that sample the text.
+    """
+    path = load_config().get("text_source")
+    if path:
+        try:
+            ensure_index(resource_path(path))
+        except (OSError, ValueError) as e:
+            print(f"Cannot index the text source {path}: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the sentence-offset index of a large UTF-8 text file")
+    parser.add_argument("path", help="Text file")
+    args = parser.parse_args()
+    print(f"Index written to {build_index(args.path)}")